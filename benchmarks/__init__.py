@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+
+from benchmarks.cases import BenchmarkCase
+from benchmarks.cases import CASES
+from benchmarks.runner import run_benchmarks
+from benchmarks.runner import find_regressions
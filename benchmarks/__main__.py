@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+
+from benchmarks.cases import CASES
+from benchmarks.runner import find_regressions, format_results, run_benchmarks
+
+
+def _positive_int(text: str) -> int:
+    """Parse a strictly positive integer command line value."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {text!r}") from None
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return value
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the benchmarks from the command line.
+
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :return: Exit status: 0 on success, 1 if a regression was found
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure IterativeRecursionEngine overhead in steps/sec."
+    )
+    parser.add_argument(
+        "cases", nargs="*", metavar="case",
+        help=f"Cases to run (default: all). One of: {', '.join(CASES)}"
+    )
+    parser.add_argument(
+        "--steps", type=_positive_int, default=100_000, help="Steps per repetition"
+    )
+    parser.add_argument(
+        "--repeat", type=_positive_int, default=5, help="Repetitions per workload"
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this JSON results file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="Allowed relative slowdown versus the baseline (default: 0.1)"
+    )
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.cases or None, steps=args.steps, repeat=args.repeat)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+        print("\nNo regressions versus baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
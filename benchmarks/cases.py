@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+from dataclasses import dataclass
+from typing import Callable
+
+from iterativerecursion import IterativeRecursionEngine, FunctionReturn
+
+# Native recursion runs in chunks of this depth to stay below the
+# interpreter's recursion limit
+RECURSION_CHUNK = 200
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    One engine workload and its plain Python equivalents.
+
+    Every callable performs the given number of steps and returns nothing.
+
+    Attributes:
+        name: Identifier used in results and baselines.
+        description: One-line summary of what is measured.
+        engine: Runs the workload through IterativeRecursionEngine.
+        hand_loop: Runs the same workload as a hand-written while loop.
+        recursion: Runs it with native recursion, or None if not meaningful.
+    """
+    name: str
+    description: str
+    engine: Callable[[int], None]
+    hand_loop: Callable[[int], None]
+    recursion: Callable[[int], None] | None = None
+
+
+def _recurse_in_chunks(recurse: Callable[[int], int], steps: int) -> None:
+    """Run a recursive countdown of steps calls without exceeding the stack limit."""
+    while steps > 0:
+        depth = min(steps, RECURSION_CHUNK)
+        recurse(depth)
+        steps -= depth
+
+
+def _self_loop_case() -> BenchmarkCase:
+    """A single function calling itself."""
+    engine = IterativeRecursionEngine()
+
+    @engine.register
+    def countdown(n: int) -> FunctionReturn:
+        if n <= 1:
+            return FunctionReturn(returned_values={"n": 0})
+        return FunctionReturn(
+            returned_values={"n": n - 1},
+            next_function_to_call="countdown"
+        )
+
+    def run_engine(steps: int) -> None:
+        engine.reset()
+        engine.start_function_caller(
+            next_function_to_call="countdown",
+            environment_variables={"n": steps},
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_hand_loop(steps: int) -> None:
+        n = steps
+        while n > 1:
+            n -= 1
+
+    def recurse(n: int) -> int:
+        if n <= 1:
+            return 0
+        return recurse(n - 1)
+
+    return BenchmarkCase(
+        name="self_loop",
+        description="One function calling itself by name",
+        engine=run_engine,
+        hand_loop=run_hand_loop,
+        recursion=lambda steps: _recurse_in_chunks(recurse, steps)
+    )
+
+
+def _multi_function_cycle_case() -> BenchmarkCase:
+    """Three functions calling each other in turn."""
+    engine = IterativeRecursionEngine()
+
+    def make_step(name: str, next_name: str) -> Callable[..., FunctionReturn]:
+        def step(n: int) -> FunctionReturn:
+            if n <= 1:
+                return FunctionReturn(returned_values={"n": 0})
+            return FunctionReturn(
+                returned_values={"n": n - 1},
+                next_function_to_call=next_name
+            )
+        step.__name__ = name
+        return step
+
+    engine.add_function(make_step("first", "second"))
+    engine.add_function(make_step("second", "third"))
+    engine.add_function(make_step("third", "first"))
+
+    def run_engine(steps: int) -> None:
+        engine.reset()
+        engine.start_function_caller(
+            next_function_to_call="first",
+            environment_variables={"n": steps},
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_hand_loop(steps: int) -> None:
+        n = steps
+        state = 0
+        while n > 1:
+            n -= 1
+            state = (state + 1) % 3
+
+    def first(n: int) -> int:
+        return 0 if n <= 1 else second(n - 1)
+
+    def second(n: int) -> int:
+        return 0 if n <= 1 else third(n - 1)
+
+    def third(n: int) -> int:
+        return 0 if n <= 1 else first(n - 1)
+
+    return BenchmarkCase(
+        name="multi_function_cycle",
+        description="Three functions calling each other in a cycle",
+        engine=run_engine,
+        hand_loop=run_hand_loop,
+        recursion=lambda steps: _recurse_in_chunks(first, steps)
+    )
+
+
+def _many_variables_case(variables: int = 1000, updated: int = 20) -> BenchmarkCase:
+    """A self loop in a large environment, updating many variables per step."""
+    engine = IterativeRecursionEngine()
+    names = [f"var_{i}" for i in range(updated)]
+    initial = {f"var_{i}": i for i in range(variables)}
+
+    @engine.register
+    def update(n: int) -> FunctionReturn:
+        values = dict.fromkeys(names, n)
+        values["n"] = n - 1
+        return FunctionReturn(
+            returned_values=values,
+            next_function_to_call="update" if n > 1 else None,
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_engine(steps: int) -> None:
+        engine.reset()
+        engine.start_function_caller(
+            next_function_to_call="update",
+            environment_variables={**initial, "n": steps},
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_hand_loop(steps: int) -> None:
+        environment = {**initial, "n": steps}
+        n = steps
+        while True:
+            environment.update(dict.fromkeys(names, n))
+            environment["n"] = n - 1
+            if n <= 1:
+                break
+            n = environment["n"]
+
+    return BenchmarkCase(
+        name="many_variables",
+        description=f"{variables} variables in the environment, {updated} updated per step",
+        engine=run_engine,
+        hand_loop=run_hand_loop
+    )
+
+
+def _many_returned_values_case(returned: int = 100) -> BenchmarkCase:
+    """A self loop in a small environment, returning many values per step."""
+    engine = IterativeRecursionEngine()
+    names = [f"out_{i}" for i in range(returned)]
+
+    @engine.register
+    def emit(n: int) -> FunctionReturn:
+        values = dict.fromkeys(names, n)
+        values["n"] = n - 1
+        return FunctionReturn(
+            returned_values=values,
+            next_function_to_call="emit" if n > 1 else None,
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_engine(steps: int) -> None:
+        engine.reset()
+        engine.start_function_caller(
+            next_function_to_call="emit",
+            environment_variables={"n": steps},
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_hand_loop(steps: int) -> None:
+        environment = {"n": steps}
+        n = steps
+        while True:
+            environment.update(dict.fromkeys(names, n))
+            environment["n"] = n - 1
+            if n <= 1:
+                break
+            n = environment["n"]
+
+    return BenchmarkCase(
+        name="many_returned_values",
+        description=f"{returned} values returned per step",
+        engine=run_engine,
+        hand_loop=run_hand_loop
+    )
+
+
+def _large_arg_env_mapping_case(parameters: int = 50) -> BenchmarkCase:
+    """A self loop binding many parameters from the environment on every call."""
+    engine = IterativeRecursionEngine()
+    mapping = {f"p{i}": f"var_{i}" for i in range(parameters)}
+    mapping["n"] = "n"
+    initial = {f"var_{i}": i for i in range(parameters)}
+
+    @engine.register
+    def wide(n: int, **params: int) -> FunctionReturn:
+        return FunctionReturn(
+            returned_values={"n": n - 1},
+            next_function_to_call="wide" if n > 1 else None,
+            arg_env_mapping=mapping
+        )
+
+    def run_engine(steps: int) -> None:
+        engine.reset()
+        engine.start_function_caller(
+            next_function_to_call="wide",
+            environment_variables={**initial, "n": steps},
+            arg_env_mapping=mapping
+        )
+
+    def run_hand_loop(steps: int) -> None:
+        environment = {**initial, "n": steps}
+        while True:
+            arguments = {arg: environment[key] for arg, key in mapping.items()}
+            environment["n"] = arguments["n"] - 1
+            if arguments["n"] <= 1:
+                break
+
+    return BenchmarkCase(
+        name="large_arg_env_mapping",
+        description=f"{parameters} parameters resolved from the environment per call",
+        engine=run_engine,
+        hand_loop=run_hand_loop
+    )
+
+
+def _deep_chain_case(length: int = 500) -> BenchmarkCase:
+    """A long chain of distinct functions, each calling the next one."""
+    engine = IterativeRecursionEngine()
+
+    def make_link(index: int) -> Callable[..., FunctionReturn]:
+        next_name = f"link_{(index + 1) % length}"
+
+        def link(n: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"n": n - 1},
+                next_function_to_call=next_name if n > 1 else None
+            )
+        link.__name__ = f"link_{index}"
+        return link
+
+    links = [make_link(index) for index in range(length)]
+    for link in links:
+        engine.add_function(link)
+
+    def run_engine(steps: int) -> None:
+        engine.reset()
+        engine.start_function_caller(
+            next_function_to_call="link_0",
+            environment_variables={"n": steps},
+            arg_env_mapping={"n": "n"}
+        )
+
+    def run_hand_loop(steps: int) -> None:
+        n = steps
+        index = 0
+        while n > 1:
+            n -= 1
+            index = (index + 1) % length
+
+    def make_native_link(index: int) -> Callable[[int], int]:
+        next_index = (index + 1) % length
+
+        def native_link(n: int) -> int:
+            return 0 if n <= 1 else native_links[next_index](n - 1)
+        return native_link
+
+    native_links = [make_native_link(index) for index in range(length)]
+
+    def run_recursion(steps: int) -> None:
+        # Each chunk resumes the chain where the previous one stopped
+        index = 0
+        while steps > 0:
+            depth = min(steps, RECURSION_CHUNK)
+            native_links[index](depth)
+            index = (index + depth) % length
+            steps -= depth
+
+    return BenchmarkCase(
+        name="deep_chain",
+        description=f"Chain of {length} distinct functions",
+        engine=run_engine,
+        hand_loop=run_hand_loop,
+        recursion=run_recursion
+    )
+
+
+CASES: dict[str, Callable[[], BenchmarkCase]] = {
+    "self_loop": _self_loop_case,
+    "multi_function_cycle": _multi_function_cycle_case,
+    "many_variables": _many_variables_case,
+    "many_returned_values": _many_returned_values_case,
+    "large_arg_env_mapping": _large_arg_env_mapping_case,
+    "deep_chain": _deep_chain_case,
+}
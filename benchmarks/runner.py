@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import platform
+import time
+from typing import Any, Callable, Iterable
+
+from benchmarks.cases import CASES
+
+
+def measure(run: Callable[[int], None], steps: int, repeat: int) -> float:
+    """
+    Measure the throughput of a workload.
+
+    :param run: Callable performing steps steps
+    :param steps: Number of steps per repetition
+    :param repeat: Number of repetitions; the fastest one is kept
+    :return: Steps per second of the fastest repetition
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(steps)
+        best = min(best, time.perf_counter() - start)
+    return steps / best
+
+
+def run_benchmarks(
+    names: Iterable[str] | None = None,
+    steps: int = 100_000,
+    repeat: int = 5
+) -> dict[str, Any]:
+    """
+    Run benchmark cases and collect their steps/sec.
+
+    :param names: Cases to run. None runs all of them.
+    :param steps: Number of steps per repetition
+    :param repeat: Number of repetitions per workload
+    :return: JSON-serializable results with one entry per case
+    :raises KeyError: If a case name is unknown
+    :raises ValueError: If steps or repeat is not positive
+    """
+    if steps <= 0 or repeat <= 0:
+        raise ValueError(
+            f"steps and repeat must be positive, got steps={steps}, repeat={repeat}"
+        )
+
+    names = list(CASES) if names is None else list(names)
+    unknown = set(names) - CASES.keys()
+    if unknown:
+        raise KeyError(
+            f"Unknown benchmark cases: {unknown}. Available cases: {set(CASES)}"
+        )
+
+    results = {}
+    for name in names:
+        case = CASES[name]()
+        engine = measure(case.engine, steps, repeat)
+        hand_loop = measure(case.hand_loop, steps, repeat)
+        recursion = (
+            None if case.recursion is None
+            else measure(case.recursion, steps, repeat)
+        )
+        results[name] = {
+            "description": case.description,
+            "engine_steps_per_sec": engine,
+            "hand_loop_steps_per_sec": hand_loop,
+            "recursion_steps_per_sec": recursion,
+            "overhead_vs_hand_loop": hand_loop / engine,
+        }
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "steps": steps,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def find_regressions(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float
+) -> list[str]:
+    """
+    Compare engine throughput against a stored baseline.
+
+    Cases missing from either side are ignored.
+
+    :param results: Output of run_benchmarks
+    :param baseline: Earlier output of run_benchmarks
+    :param threshold: Allowed relative slowdown, e.g. 0.1 for 10%
+    :return: One message per case whose steps/sec dropped by more than threshold
+    """
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+
+        before = previous["engine_steps_per_sec"]
+        after = current["engine_steps_per_sec"]
+        if after < before * (1 - threshold):
+            regressions.append(
+                f"{name}: {after:,.0f} steps/sec, down {1 - after / before:.1%} "
+                f"from {before:,.0f} (threshold {threshold:.0%})"
+            )
+    return regressions
+
+
+def format_results(results: dict[str, Any]) -> str:
+    """
+    Render results as a plain-text table.
+
+    :param results: Output of run_benchmarks
+    :return: The table
+    """
+    lines = [
+        f"{'case':<24}{'engine':>14}{'hand loop':>14}{'recursion':>14}{'overhead':>10}"
+    ]
+    for name, result in results["results"].items():
+        recursion = result["recursion_steps_per_sec"]
+        lines.append(
+            f"{name:<24}"
+            f"{result['engine_steps_per_sec']:>14,.0f}"
+            f"{result['hand_loop_steps_per_sec']:>14,.0f}"
+            f"{'-' if recursion is None else format(recursion, ',.0f'):>14}"
+            f"{result['overhead_vs_hand_loop']:>9.1f}x"
+        )
+    return "\n".join(lines)
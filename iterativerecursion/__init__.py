@@ -3,3 +3,9 @@
 from iterativerecursion.iterativerecursion import IterativeRecursionEngine
 from iterativerecursion.iterativerecursion import FunctionReturn
 from iterativerecursion.iterativerecursion import VarsDict
+from iterativerecursion.iterativerecursion import Thunk
+from iterativerecursion.iterativerecursion import RunStats
+from iterativerecursion.environment import MmapEnvironment
+from iterativerecursion.pool import RunPool
+from iterativerecursion.pool import PoolStats
+from iterativerecursion.profiler import SamplingProfiler
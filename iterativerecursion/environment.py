@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import mmap
+import os
+import shutil
+import tempfile
+import weakref
+from collections.abc import Iterator, MutableMapping
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class _SpilledValue:
+    """
+    Location and layout of a value stored on disk by MmapEnvironment.
+
+    Attributes:
+        path: File holding the raw bytes of the value.
+        shape: Shape of the array or buffer.
+        dtype: NumPy dtype string, or None for buffers.
+        format: struct format of the buffer items, or None for NumPy arrays.
+    """
+    path: str
+    shape: tuple[int, ...]
+    dtype: str | None = None
+    format: str | None = None
+
+
+def _is_ndarray(value: Any) -> bool:
+    """Detect NumPy arrays without importing NumPy."""
+    return type(value).__module__ == "numpy" and hasattr(value, "__array_interface__")
+
+
+class MmapEnvironment(MutableMapping):
+    """
+    Environment backend that spills large values to memory-mapped files.
+
+    Buffers (bytes, bytearray, memoryview, array.array or anything exposing
+    the buffer protocol) and NumPy arrays larger than size_threshold bytes
+    are written to a private directory instead of being kept in memory.
+    Reading them back maps the file read-only and returns a zero-copy view:
+    a memoryview with the item format and shape of the original buffer, or a
+    read-only NumPy array for arrays. The operating system pages the data in
+    and out on demand, so the resident set stays bounded however many large
+    values the environment holds. Storing a view this mapping handed out,
+    e.g. a step returning a spilled argument unchanged, reuses the existing
+    file instead of writing it again.
+
+    Every other value is kept in an ordinary dict, as are the layouts a
+    flat file cannot round-trip: object and structured NumPy arrays, and
+    non-contiguous buffers or buffers whose format memoryview cannot cast.
+
+    Example:
+        with MmapEnvironment(size_threshold=1 << 20) as environment:
+            engine = IterativeRecursionEngine(environment=environment)
+            engine.start_function_caller(...)
+    """
+    def __init__(self, size_threshold: int = 1 << 20, directory: str | None = None):
+        """
+        :param size_threshold: Values whose size in bytes is above this limit
+            are spilled to disk. Defaults to 1 MiB.
+        :param directory: Parent directory for the spill files. Defaults to
+            the system temporary directory.
+        """
+        if size_threshold < 0:
+            raise ValueError(
+                f"size_threshold must be >= 0, got {size_threshold}"
+            )
+
+        self.size_threshold = size_threshold
+        self._directory = tempfile.mkdtemp(prefix="iterativerecursion-", dir=directory)
+        # Removes the spill directory on close(), garbage collection or exit
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        self._resident: dict[str, Any] = {}
+        self._spilled: dict[str, _SpilledValue] = {}
+        # Number of keys referring to each spill file
+        self._file_refs: dict[str, int] = {}
+        # Views handed out by _load, by id, with the file they map
+        self._handed_out: dict[int, tuple[weakref.ref, _SpilledValue]] = {}
+        self._file_counter = 0
+
+    def _spill_layout(self, value: Any) -> _SpilledValue | None:
+        """
+        Describe how a value would be spilled, or return None if it must stay resident.
+
+        The returned description has an empty path until the value is written.
+        """
+        if isinstance(value, (str, int, float, bool, type(None))):
+            return None
+
+        if _is_ndarray(value):
+            dtype = value.dtype
+            if dtype.hasobject or dtype.fields is not None or value.nbytes <= self.size_threshold:
+                return None
+            return _SpilledValue("", tuple(value.shape), dtype=dtype.str)
+
+        try:
+            view = memoryview(value)
+        except TypeError:
+            return None
+
+        with view:
+            if view.nbytes <= self.size_threshold or view.ndim == 0 or not view.c_contiguous:
+                return None
+            try:
+                # Loading casts the mapped bytes back to the original layout
+                with view.cast("B") as raw, raw.cast(view.format, view.shape):
+                    pass
+            except (TypeError, ValueError):
+                return None
+            return _SpilledValue("", tuple(view.shape), format=view.format)
+
+    def _write(self, value: Any, layout: _SpilledValue) -> _SpilledValue:
+        """Write a spillable value to a new file and return its description."""
+        if layout.dtype is not None:
+            # tobytes() always yields C order, whatever the source layout
+            data = memoryview(value.tobytes(order="C"))
+        else:
+            data = memoryview(value).cast("B")
+
+        self._file_counter += 1
+        path = os.path.join(self._directory, f"{self._file_counter}.bin")
+        with data, open(path, "wb") as file:
+            file.write(data)
+
+        return _SpilledValue(path, layout.shape, layout.dtype, layout.format)
+
+    def _load(self, spilled: _SpilledValue) -> Any:
+        """Map a spilled value read-only and return a zero-copy view of it."""
+        with open(spilled.path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if spilled.dtype is None:
+            view = memoryview(mapped).cast(spilled.format, spilled.shape)
+        else:
+            import numpy
+
+            view = numpy.frombuffer(mapped, dtype=spilled.dtype).reshape(spilled.shape)
+
+        handed_out = self._handed_out
+        view_id = id(view)
+
+        def forget(ref: weakref.ref) -> None:
+            if handed_out.get(view_id, (None,))[0] is ref:
+                del handed_out[view_id]
+
+        handed_out[view_id] = (weakref.ref(view, forget), spilled)
+        return view
+
+    def _handed_out_file(self, value: Any) -> _SpilledValue | None:
+        """Return the spill file a value is a view of, if this mapping loaded it and the file still exists."""
+        entry = self._handed_out.get(id(value))
+        if entry is None or entry[0]() is not value:
+            return None
+        spilled = entry[1]
+        return spilled if spilled.path in self._file_refs else None
+
+    def _attach(self, key: str, spilled: _SpilledValue) -> None:
+        """Point a key at a spill file, replacing whatever it held."""
+        self._file_refs[spilled.path] = self._file_refs.get(spilled.path, 0) + 1
+        self._discard(key)
+        self._spilled[key] = spilled
+
+    def _discard(self, key: str) -> None:
+        """Remove a key from both stores, deleting its spill file if any."""
+        self._resident.pop(key, None)
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None:
+            remaining = self._file_refs[spilled.path] - 1
+            if remaining:
+                self._file_refs[spilled.path] = remaining
+            else:
+                del self._file_refs[spilled.path]
+                # Views handed out earlier keep their own mapping alive
+                os.remove(spilled.path)
+
+    def is_spilled(self, key: str) -> bool:
+        """
+        Tell whether a variable currently lives on disk.
+
+        :param key: Environment variable name
+        :return: True if the value was spilled to a memory-mapped file
+        """
+        return key in self._spilled
+
+    def alias(self, target: str, source: str) -> None:
+        """
+        Bind a variable to the value stored under another one without copying it.
+
+        A spilled source shares its file with the target; the file is deleted
+        once no variable refers to it.
+
+        :param target: Variable to bind
+        :param source: Existing variable holding the value
+        :raises KeyError: If source does not exist
+        """
+        spilled = self._spilled.get(source)
+        if spilled is not None:
+            self._attach(target, spilled)
+            return
+
+        value = self._resident[source]
+        self._discard(target)
+        self._resident[target] = value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._resident[key]
+        except KeyError:
+            return self._load(self._spilled[key])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        spilled = self._handed_out_file(value)
+        if spilled is not None:
+            self._attach(key, spilled)
+            return
+
+        layout = self._spill_layout(value)
+        if layout is not None:
+            self._attach(key, self._write(value, layout))
+        else:
+            self._discard(key)
+            self._resident[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._discard(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._resident or key in self._spilled
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._resident
+        yield from self._spilled
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._spilled)
+
+    def clear(self) -> None:
+        """Remove every variable and delete all spill files."""
+        for path in self._file_refs:
+            os.remove(path)
+        self._file_refs.clear()
+        self._spilled.clear()
+        self._resident.clear()
+
+    def close(self) -> None:
+        """Remove every variable and the spill directory itself."""
+        self._resident.clear()
+        self._spilled.clear()
+        self._file_refs.clear()
+        self._finalizer()
+
+    def __enter__(self) -> "MmapEnvironment":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(resident={len(self._resident)}, "
+            f"spilled={len(self._spilled)}, size_threshold={self.size_threshold})"
+        )
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
+import json
+import operator
+from collections.abc import Iterable, MutableMapping
 from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Any, Callable
 
 VarsDict = dict[str, Any]
@@ -13,11 +17,17 @@ class FunctionReturn:
 
     Attributes:
         returned_values: Dictionary of values to update in the environment.
-        next_function_to_call: Name of the next function to execute, or None to
-            terminate execution.
+        next_function_to_call: Name or integer ID of the next function to
+            execute, or None to terminate execution. IDs are returned by
+            add_function and IterativeRecursionEngine.function_id, and skip
+            the name lookup.
         arg_env_mapping: Mapping of parameter names to environment variable keys
             for the next function call. If not provided, automatically maps
             returned_values keys to themselves (e.g., {"x": 5} maps to {"x": "x"}).
+        return_to: Function to resume once a mounted sub-workflow named in
+            next_function_to_call finishes, or None to finish this workflow
+            too. arg_env_mapping then applies to return_to instead. Setting
+            it when next_function_to_call is not a mount raises ValueError.
 
     Example:
         # Simplest form - auto-mapping
@@ -34,8 +44,9 @@ class FunctionReturn:
         )
     """
     returned_values: dict[str, Any]
-    next_function_to_call: str | None = None
+    next_function_to_call: str | int | None = None
     arg_env_mapping: dict[str, str] = field(default_factory=dict)
+    return_to: str | int | None = None
 
     def __post_init__(self):
         """Auto-populate arg_env_mapping if not provided."""
@@ -44,6 +55,131 @@ class FunctionReturn:
             self.arg_env_mapping = {k: k for k in self.returned_values.keys()}
 
 
+class Thunk:
+    """
+    Deferred value for the environment, computed at most once.
+
+    A function can put a Thunk in returned_values instead of an expensive
+    value that only some later functions need. The engine calls it the first
+    time the variable is bound to a parameter and stores the result in its
+    place. Thunks that are never bound are dropped from the environment when
+    the run finishes, without being evaluated.
+
+    Example:
+        return FunctionReturn(
+            returned_values={"report": Thunk(lambda: build_report(data))},
+            next_function_to_call="maybe_publish"
+        )
+    """
+    __slots__ = ("_compute", "_value")
+
+    def __init__(self, compute: Callable[[], Any]):
+        """
+        :param compute: Zero-argument callable producing the value.
+        """
+        self._compute: Callable[[], Any] | None = compute
+        self._value: Any = None
+
+    @property
+    def evaluated(self) -> bool:
+        """Whether the value has already been computed."""
+        return self._compute is None
+
+    def force(self) -> Any:
+        """
+        Compute the value on first use and return the cached result afterwards.
+
+        :return: The value produced by the compute callable
+        """
+        if self._compute is not None:
+            self._value = self._compute()
+            # Release the closure and everything it captured
+            self._compute = None
+        return self._value
+
+    def __repr__(self) -> str:
+        if self._compute is None:
+            return f"{type(self).__name__}(value={self._value!r})"
+        return f"{type(self).__name__}(<pending>)"
+
+
+@dataclass
+class RunStats:
+    """
+    Statistics for the latest start_function_caller run of an engine.
+
+    Attributes:
+        thunks_evaluated: Thunks computed because a function read them.
+        thunks_skipped: Thunks still unread in the environment when the run
+            ended, dropped without being computed. Thunks overwritten during
+            the run are discarded without being counted.
+    """
+    thunks_evaluated: int = 0
+    thunks_skipped: int = 0
+
+
+@dataclass
+class _Scope:
+    """
+    Naming context of the functions of one workflow inside an engine.
+
+    Attributes:
+        prefix: Prefix of this workflow's environment keys and function names,
+            "" for the engine's own functions.
+        function_ids: Local function and mount names to engine-wide IDs.
+        id_map: Local IDs to engine-wide IDs, or None if they are the same.
+    """
+    prefix: str
+    function_ids: dict[str, int]
+    id_map: list[int] | None = None
+
+    def translate(self, local_id: int) -> int | None:
+        """Translate a local function ID into an engine-wide one, or None if unknown."""
+        # Normalise int subclasses such as IntEnum members
+        local_id = operator.index(local_id)
+        if self.id_map is None:
+            return local_id
+        if 0 <= local_id < len(self.id_map):
+            return self.id_map[local_id]
+        return None
+
+
+@dataclass
+class _Mount:
+    """
+    Sub-workflow mounted into an engine.
+
+    Attributes:
+        name: Engine-wide name of the mount.
+        entry_id: Engine-wide ID of the first function of the sub-workflow.
+        scope: Scope of the sub-workflow's functions.
+        inputs: Sub-workflow variables to caller variables they are bound to.
+        outputs: Caller variables to sub-workflow variables they receive.
+    """
+    name: str
+    entry_id: int
+    scope: _Scope
+    inputs: dict[str, str]
+    outputs: dict[str, str]
+
+
+@dataclass
+class _Frame:
+    """
+    Sub-workflow call in progress.
+
+    Attributes:
+        mount: The called sub-workflow.
+        caller_scope: Scope of the function that made the call.
+        return_to_id: Function to resume afterwards, or None.
+        arg_env_mapping: Arguments of the function to resume.
+    """
+    mount: _Mount
+    caller_scope: _Scope
+    return_to_id: int | None
+    arg_env_mapping: dict[str, str]
+
+
 class IterativeRecursionEngine:
     """
     Execute functions and "call" between them without recursion.
@@ -54,10 +190,50 @@ class IterativeRecursionEngine:
     When you call a function, the values that return will update
     self.environment_variables, you pass only self.environment_variables
     as arguments to a function.
+
+    The environment is a plain dict unless another mapping is passed in, e.g.
+    an MmapEnvironment that keeps large values in memory-mapped files.
+
+    Every function name gets an integer ID the first time it is registered
+    or declared as a successor. Functions can declare their possible
+    successors, which builds a static transition graph that can be checked
+    before running and exported with transition_graph_to_dot/_json.
+
+    Other engines can be mounted under a namespace and called as
+    sub-workflows. Their functions run in the same dispatch loop, and their
+    variables live in the same environment under the "namespace." prefix.
     """
-    def __init__(self):
+    def __init__(self, environment: MutableMapping[str, Any] | None = None):
+        """
+        :param environment: Mapping used as the environment backend. Defaults
+            to a new empty dict. A backend may provide alias(target, source)
+            to bind one variable to another's stored value without copying it.
+        """
         self.functions_dict: dict[str, Callable[..., FunctionReturn]] = {}
-        self.environment_variables: VarsDict = {}
+        # Dispatch tables indexed by function ID. A name declared as a
+        # successor but not registered yet has None as its function.
+        self._function_ids: dict[str, int] = {}
+        self._function_names: list[str] = []
+        self._function_table: list[Callable[..., FunctionReturn] | None] = []
+        self._successor_ids: list[frozenset[int] | None] = []
+        self._function_scopes: list[_Scope | None] = []
+        self._root_scope = _Scope(prefix="", function_ids=self._function_ids)
+        # Mounted sub-workflows by the ID of their namespace
+        self._mounts: dict[int, _Mount] = {}
+        self.environment_variables: MutableMapping[str, Any] = (
+            {} if environment is None else environment
+        )
+        self.stats = RunStats()
+        # Thunks forced during the current run, with their value as stored
+        # in the environment. A Thunk can be bound under several keys, e.g.
+        # by sub-workflow inputs and outputs.
+        self._forced_thunks: dict[Thunk, Any] = {}
+        # Name of the function being executed, read by SamplingProfiler
+        self.current_function: str | None = None
+        # Number of start_function_caller calls in progress
+        self._run_depth = 0
+        # Set on engines sharing a read-only registry, e.g. pooled ones
+        self._registry_frozen = False
 
     def _validate_function_return(self, resp: Any, func_name: str) -> None:
         """
@@ -81,12 +257,21 @@ class IterativeRecursionEngine:
                 f"got {type(resp.arg_env_mapping).__name__}"
             )
 
-        if resp.next_function_to_call is not None and not isinstance(
-            resp.next_function_to_call, str
+        next_function = resp.next_function_to_call
+        if next_function is not None and (
+            not isinstance(next_function, (str, int)) or isinstance(next_function, bool)
         ):
             raise TypeError(
-                f"Function '{func_name}': next_function_to_call must be str or None, "
-                f"got {type(resp.next_function_to_call).__name__}"
+                f"Function '{func_name}': next_function_to_call must be str, int or None, "
+                f"got {type(next_function).__name__}"
+            )
+
+        if resp.return_to is not None and (
+            not isinstance(resp.return_to, (str, int)) or isinstance(resp.return_to, bool)
+        ):
+            raise TypeError(
+                f"Function '{func_name}': return_to must be str, int or None, "
+                f"got {type(resp.return_to).__name__}"
             )
 
         if not isinstance(resp.returned_values, dict):
@@ -96,43 +281,174 @@ class IterativeRecursionEngine:
             )
 
     def _resolve_arguments(
-        self, arg_env_mapping: dict[str, str], func_name: str
+        self, arg_env_mapping: dict[str, str], func_name: str, prefix: str = ""
     ) -> dict[str, Any]:
         """
         Resolve argument names to actual values from environment.
 
         :param arg_env_mapping: Mapping of parameter names to environment variable keys
         :param func_name: Name of the function (for error messages)
+        :param prefix: Namespace prefix of the environment keys
         :return: Dictionary mapping parameter names to actual values
         :raises KeyError: If required environment variables are missing
         """
-        missing_vars = set(arg_env_mapping.values()) - self.environment_variables.keys()
+        if prefix:
+            arg_env_mapping = {
+                arg: prefix + env_key for arg, env_key in arg_env_mapping.items()
+            }
+
+        environment_variables = self.environment_variables
+        missing_vars = set(arg_env_mapping.values()) - environment_variables.keys()
         if missing_vars:
-            available = set(self.environment_variables.keys())
+            available = set(environment_variables.keys())
             raise KeyError(
                 f"Function '{func_name}' requires environment variables "
                 f"that don't exist: {missing_vars}. "
                 f"Available variables: {available if available else '(none)'}"
             )
 
-        return {
-            arg: self.environment_variables[env_key]
-            for arg, env_key in arg_env_mapping.items()
-        }
+        # Backends such as MmapEnvironment load values lazily on this lookup
+        arguments = {}
+        for arg, env_key in arg_env_mapping.items():
+            value = environment_variables[env_key]
+            if isinstance(value, Thunk):
+                value = self._force_thunk(env_key, value)
+            arguments[arg] = value
+        return arguments
+
+    def _force_thunk(self, env_key: str, thunk: Thunk) -> Any:
+        """
+        Evaluate a Thunk bound to a parameter and store its value in its place.
+
+        :param env_key: Environment variable holding the Thunk
+        :param thunk: The Thunk to evaluate
+        :return: The computed value, as read back from the environment
+        """
+        forced_thunks = self._forced_thunks
+        if thunk in forced_thunks:
+            # Already read through another key during this run
+            value = forced_thunks[thunk]
+        else:
+            evaluated = thunk.evaluated
+            value = thunk.force()
+            # Counted only once compute returns: a Thunk that raised is
+            # still pending and counts as skipped when the run ends
+            if not evaluated:
+                self.stats.thunks_evaluated += 1
+
+        environment_variables = self.environment_variables
+        environment_variables[env_key] = value
+        # Hand out what the backend stored, e.g. MmapEnvironment's mapped
+        # view, so a step returning it unchanged does not store a copy
+        value = forced_thunks[thunk] = environment_variables[env_key]
+        return value
+
+    def _free_thunks(self) -> None:
+        """
+        Settle the Thunks left in the environment once the outermost run ends.
+
+        Thunks nobody read are dropped and counted as skipped once, however
+        many keys hold them. Keys holding a Thunk that was read through
+        another key get its value.
+        """
+        environment_variables = self.environment_variables
+        forced_thunks = self._forced_thunks
+        # A single scan here keeps Thunk bookkeeping out of every step
+        leftovers = [
+            (key, value) for key, value in environment_variables.items()
+            if isinstance(value, Thunk)
+        ]
+
+        skipped: set[Thunk] = set()
+        for key, thunk in leftovers:
+            if thunk in forced_thunks:
+                environment_variables[key] = forced_thunks[thunk]
+            elif thunk.evaluated:
+                # Forced outside the engine: keep its value
+                environment_variables[key] = thunk.force()
+            else:
+                del environment_variables[key]
+                skipped.add(thunk)
+
+        self.stats.thunks_skipped += len(skipped)
+        forced_thunks.clear()
+
+    def _function_not_found(self, function: str | int) -> KeyError:
+        """
+        Build the error raised when a function name or ID is not registered.
+
+        :param function: The requested function name or ID
+        :return: KeyError listing the available functions
+        """
+        available_funcs = set(self.functions_dict.keys())
+        label = f"ID {function}" if isinstance(function, int) else f"'{function}'"
+        return KeyError(
+            f"Function {label} not found in registry. "
+            f"Available functions: {available_funcs if available_funcs else '(none)'}"
+        )
+
+    def _foreign_function(self, caller: str, function_id: int) -> ValueError:
+        """
+        Build the error raised when a call targets a function of another workflow.
+
+        :param caller: Description of the caller, for the message
+        :param function_id: ID of the function it tried to call
+        :return: ValueError pointing at the mounted sub-workflow to call instead
+        """
+        name = self._function_names[function_id]
+        return ValueError(
+            f"{caller} cannot call '{name}' directly: it belongs to a mounted "
+            f"sub-workflow. Call the sub-workflow by its namespace "
+            f"('{name.rsplit('.', 1)[0]}') so its inputs and outputs are bound."
+        )
+
+    def _misplaced_return_to(self, caller: str, resp: FunctionReturn) -> ValueError:
+        """
+        Build the error raised when return_to is set on a call that does not enter a sub-workflow.
+
+        :param caller: Description of the caller, for the message
+        :param resp: The caller's return value
+        :return: ValueError explaining where return_to applies
+        """
+        return ValueError(
+            f"{caller}: return_to={resp.return_to!r} requires next_function_to_call "
+            f"to be a mounted sub-workflow, got {resp.next_function_to_call!r}"
+        )
+
+    def _lookup_function(self, function: str | int) -> int:
+        """
+        Translate a function name or ID into the ID of a registered function.
+
+        :param function: Function name or ID
+        :return: The function ID
+        :raises KeyError: If no function is registered under that name or ID
+        """
+        if isinstance(function, int):
+            function_id = operator.index(function)
+        else:
+            function_id = self._function_ids.get(function)
+
+        if (
+            function_id is None
+            or not 0 <= function_id < len(self._function_table)
+            or self._function_table[function_id] is None
+        ):
+            raise self._function_not_found(function)
+        return function_id
 
     def start_function_caller(
         self,
-        next_function_to_call: str | None,
+        next_function_to_call: str | int | None,
         environment_variables: VarsDict,
         arg_env_mapping: dict[str, str],
         max_iterations: int | None = None
-    ) -> VarsDict:
+    ) -> MutableMapping[str, Any]:
         """
         Start the execution of a function.
 
-        :param next_function_to_call: What function to call first when starting
-            this function. If next_function_to_call is None, this function stops
-            and returns.
+        :param next_function_to_call: What function (name or ID) to call first
+            when starting this function. If next_function_to_call is None, this
+            function stops and returns.
         :param environment_variables: Variables to add to the environment.
         :param arg_env_mapping: Arguments to call on the first function.
         :param max_iterations: Maximum number of function calls allowed before
@@ -140,16 +456,62 @@ class IterativeRecursionEngine:
         :return: The final state of environment_variables after execution completes
         :raises RuntimeError: If max_iterations limit is reached
         :raises KeyError: If function not found or environment variable missing
-        :raises ValueError: If function returns invalid structure
+        :raises ValueError: If function returns invalid structure or calls a
+            function it did not declare as a successor
         :raises TypeError: If function return has wrong types
         """
-        self.environment_variables.update(environment_variables)
+        # A step may start a nested run on the same engine. It shares the
+        # outer run's environment, statistics and pending thunks.
+        outermost = self._run_depth == 0
+        if outermost:
+            self.stats = RunStats()
+        caller_function = self.current_function
+        self._run_depth += 1
+
+        try:
+            self.environment_variables.update(environment_variables)
+            return self._call_loop(
+                next_function_to_call, arg_env_mapping, max_iterations
+            )
+        finally:
+            self._run_depth -= 1
+            self.current_function = caller_function
+            if outermost:
+                # Thunks nobody read are freed once the run is over
+                self._free_thunks()
+
+    def _call_loop(
+        self,
+        next_function_to_call: str | int | None,
+        arg_env_mapping: dict[str, str],
+        max_iterations: int | None
+    ) -> MutableMapping[str, Any]:
+        """
+        Run the dispatch loop of start_function_caller.
 
+        :param next_function_to_call: First function to call, or None to stop
+        :param arg_env_mapping: Arguments to call on the first function
+        :param max_iterations: Maximum number of function calls, or None
+        :return: The final state of environment_variables
+        """
         if next_function_to_call is None:
             return self.environment_variables
 
-        # Resolve initial arguments
-        arg_env_mapping = self._resolve_arguments(arg_env_mapping, next_function_to_call)
+        function_names = self._function_names
+        function_table = self._function_table
+        successor_ids = self._successor_ids
+        function_scopes = self._function_scopes
+        frames: list[_Frame] = []
+
+        function_id = self._lookup_function(next_function_to_call)
+        if function_scopes[function_id] is not self._root_scope:
+            raise self._foreign_function("start_function_caller", function_id)
+
+        # Resolve initial arguments. current_function is set first so that
+        # forcing Thunks and loading spilled values is charged to the
+        # function that consumes them
+        self.current_function = function_names[function_id]
+        arguments = self._resolve_arguments(arg_env_mapping, function_names[function_id])
 
         iteration_count = 0
         while True:
@@ -159,35 +521,212 @@ class IterativeRecursionEngine:
                     raise RuntimeError(
                         f"Maximum iteration limit ({max_iterations}) reached. "
                         f"This may indicate an infinite loop. "
-                        f"Last function called: {next_function_to_call}"
+                        f"Last function called: {function_names[function_id]}"
                     )
                 iteration_count += 1
 
             # Execute function
-            resp = self.functions_dict[next_function_to_call](**arg_env_mapping)
+            resp = function_table[function_id](**arguments)
 
             # Validate return structure
-            self._validate_function_return(resp, next_function_to_call)
+            self._validate_function_return(resp, function_names[function_id])
 
             # Update environment with returned values
-            self.environment_variables.update(resp.returned_values)
-
-            # Determine next function to call
-            next_function_to_call = resp.next_function_to_call
-            if not next_function_to_call:
-                return self.environment_variables
-            elif next_function_to_call not in self.functions_dict:
-                available_funcs = set(self.functions_dict.keys())
-                raise KeyError(
-                    f"Function '{next_function_to_call}' not found in registry. "
-                    f"Available functions: {available_funcs if available_funcs else '(none)'}"
-                )
+            scope = function_scopes[function_id]
+            if scope.prefix:
+                self.environment_variables.update({
+                    scope.prefix + key: value
+                    for key, value in resp.returned_values.items()
+                })
+            else:
+                self.environment_variables.update(resp.returned_values)
+
+            # Determine next function to call: IDs index the table directly,
+            # names go through one dict lookup
+            next_function = resp.next_function_to_call
+            if isinstance(next_function, int):
+                next_id = scope.translate(next_function)
+            elif next_function:
+                next_id = scope.function_ids.get(next_function)
+            else:
+                next_id = None
+
+            if (
+                next_id is None
+                or not 0 <= next_id < len(function_table)
+                or function_table[next_id] is None
+                or function_scopes[next_id] is not scope
+                or resp.return_to is not None
+            ):
+                # Not a plain function call: end of a (sub-)workflow, call
+                # into a mounted sub-workflow, or an invalid target
+                resumed = self._dispatch_subworkflow(frames, function_id, next_id, resp)
+                if resumed is None:
+                    return self.environment_variables
+                function_id, arg_env_mapping = resumed
+            else:
+                self._check_successor(function_id, next_id)
+                function_id = next_id
+                arg_env_mapping = resp.arg_env_mapping
 
             # Resolve arguments for next function call
-            arg_env_mapping = self._resolve_arguments(
-                resp.arg_env_mapping, next_function_to_call
+            self.current_function = function_names[function_id]
+            arguments = self._resolve_arguments(
+                arg_env_mapping,
+                function_names[function_id],
+                function_scopes[function_id].prefix
+            )
+
+    def _check_successor(self, function_id: int, next_id: int) -> None:
+        """
+        Check that a function calls one of its declared successors.
+
+        :param function_id: ID of the calling function
+        :param next_id: ID of the function or mount it calls
+        :raises ValueError: If next_id is not a declared successor
+        """
+        allowed_ids = self._successor_ids[function_id]
+        if allowed_ids is not None and next_id not in allowed_ids:
+            function_name = self._function_names[function_id]
+            raise ValueError(
+                f"Function '{function_name}' called "
+                f"'{self._function_names[next_id]}', which is not one of its declared "
+                f"successors: {self.transition_graph()[function_name]}"
+            )
+
+    def _dispatch_subworkflow(
+        self,
+        frames: list[_Frame],
+        function_id: int,
+        next_id: int | None,
+        resp: FunctionReturn
+    ) -> tuple[int, dict[str, str]] | None:
+        """
+        Handle a transition that is not a plain function call.
+
+        :param frames: Sub-workflow calls in progress, updated in place
+        :param function_id: ID of the function that returned resp
+        :param next_id: Engine-wide ID resp.next_function_to_call resolved to
+        :param resp: The function's return value
+        :return: ID and argument mapping of the function to run next, or None
+            if the whole run is finished
+        :raises KeyError: If the function or a mapped variable does not exist
+        :raises ValueError: If the call is not a declared successor, or if
+            return_to is set without calling a mounted sub-workflow
+        """
+        next_function = resp.next_function_to_call
+        caller = f"Function '{self._function_names[function_id]}'"
+        if next_id is None and not isinstance(next_function, int) and not next_function:
+            if resp.return_to is not None:
+                raise self._misplaced_return_to(caller, resp)
+            return self._leave_subworkflows(frames)
+
+        caller_scope = self._function_scopes[function_id]
+        mount = self._mounts.get(next_id)
+        if mount is None:
+            if (
+                next_id is not None
+                and 0 <= next_id < len(self._function_table)
+                and self._function_table[next_id] is not None
+            ):
+                if self._function_scopes[next_id] is caller_scope:
+                    raise self._misplaced_return_to(caller, resp)
+                raise self._foreign_function(caller, next_id)
+            raise self._function_not_found(next_function)
+        self._check_successor(function_id, next_id)
+
+        return_to_id = None
+        if resp.return_to is not None:
+            if isinstance(resp.return_to, int):
+                return_to_id = caller_scope.translate(resp.return_to)
+            else:
+                return_to_id = caller_scope.function_ids.get(resp.return_to)
+            if (
+                return_to_id is None
+                or not 0 <= return_to_id < len(self._function_table)
+                or self._function_table[return_to_id] is None
+            ):
+                raise self._function_not_found(resp.return_to)
+            if self._function_scopes[return_to_id] is not caller_scope:
+                raise self._foreign_function(caller, return_to_id)
+            self._check_successor(function_id, return_to_id)
+
+        # Bind inputs by reference: values are not copied
+        self._bind_mapping(
+            mount.inputs, mount.scope.prefix, caller_scope.prefix, mount.name
+        )
+        frames.append(_Frame(mount, caller_scope, return_to_id, resp.arg_env_mapping))
+
+        return mount.entry_id, {name: name for name in mount.inputs}
+
+    def _leave_subworkflows(
+        self, frames: list[_Frame]
+    ) -> tuple[int, dict[str, str]] | None:
+        """
+        Return from finished sub-workflows to the first caller that resumes.
+
+        :param frames: Sub-workflow calls in progress, updated in place
+        :return: ID and argument mapping of the function to resume, or None
+            if no caller resumes
+        """
+        while frames:
+            frame = frames.pop()
+            self._bind_mapping(
+                frame.mount.outputs, frame.caller_scope.prefix,
+                frame.mount.scope.prefix, frame.mount.name
+            )
+            if frame.return_to_id is not None:
+                return frame.return_to_id, frame.arg_env_mapping
+        return None
+
+    def _bind_mapping(
+        self,
+        mapping: dict[str, str],
+        target_prefix: str,
+        source_prefix: str,
+        func_name: str
+    ) -> None:
+        """
+        Bind environment variables to the values of others across namespaces.
+
+        :param mapping: Target variable names to source variable names
+        :param target_prefix: Namespace prefix of the target variables
+        :param source_prefix: Namespace prefix of the source variables
+        :param func_name: Sub-workflow being entered or left (for error messages)
+        :raises KeyError: If a source variable does not exist
+        """
+        environment_variables = self.environment_variables
+        missing_vars = {
+            source_prefix + source for source in mapping.values()
+        } - environment_variables.keys()
+        if missing_vars:
+            raise KeyError(
+                f"Sub-workflow '{func_name}' maps environment variables "
+                f"that don't exist: {missing_vars}"
             )
 
+        alias = getattr(environment_variables, "alias", None)
+        if alias is None:
+            environment_variables.update({
+                target_prefix + target: environment_variables[source_prefix + source]
+                for target, source in mapping.items()
+            })
+            return
+
+        # Let the backend share stored values (e.g. spill files) between keys
+        for target, source in mapping.items():
+            alias(target_prefix + target, source_prefix + source)
+
+    def reset(self) -> None:
+        """
+        Forget all environment variables and statistics, keeping the registry.
+
+        The environment mapping itself is cleared in place and reused.
+        """
+        self.environment_variables.clear()
+        self._forced_thunks.clear()
+        self.stats = RunStats()
+
     def add_environment_variables(self, environment_variables_dict_update: VarsDict):
         """
         Define new variables inside of the executor.
@@ -196,15 +735,68 @@ class IterativeRecursionEngine:
         """
         self.environment_variables.update(environment_variables_dict_update)
 
-    def add_function(self, function: Callable[..., FunctionReturn]) -> None:
+    def _intern_function_name(self, name: str) -> int:
+        """
+        Return the ID of a function name, allocating one on first use.
+
+        :param name: Function name
+        :return: The function ID
+        """
+        function_id = self._function_ids.get(name)
+        if function_id is None:
+            function_id = len(self._function_names)
+            self._function_ids[name] = function_id
+            self._function_names.append(name)
+            self._function_table.append(None)
+            self._successor_ids.append(None)
+            self._function_scopes.append(None)
+        return function_id
+
+    def add_function(
+        self,
+        function: Callable[..., FunctionReturn],
+        successors: Iterable[str] | None = None
+    ) -> int:
         """
         Define new functions inside of the executor.
 
         :param function: Function to add. Must return FunctionReturn structure.
+        :param successors: Names of the functions it may call next. None means
+            any function. Calling an undeclared function raises ValueError.
+        :return: The integer ID of the function
+        :raises TypeError: If a successor is not a function name
+        :raises RuntimeError: If the engine uses a frozen registry
         """
-        self.functions_dict[function.__name__] = function
+        self._check_registry_writable()
+        name = function.__name__
+        if successors is not None:
+            successors = tuple(successors)
+            for successor in successors:
+                if not isinstance(successor, str):
+                    raise TypeError(
+                        f"Function '{name}': successors must be function names, "
+                        f"got {type(successor).__name__}"
+                    )
+
+        if self._function_ids.get(name) in self._mounts:
+            raise ValueError(f"'{name}' is already the name of a mounted sub-workflow")
+
+        self.functions_dict[name] = function
+        function_id = self._intern_function_name(name)
+        self._function_table[function_id] = function
+        self._function_scopes[function_id] = self._root_scope
+        self._successor_ids[function_id] = (
+            None if successors is None
+            else frozenset(self._intern_function_name(s) for s in successors)
+        )
+        return function_id
 
-    def register(self, func: Callable[..., FunctionReturn]) -> Callable[..., FunctionReturn]:
+    def register(
+        self,
+        func: Callable[..., FunctionReturn] | None = None,
+        *,
+        successors: Iterable[str] | None = None
+    ) -> Callable[..., Any]:
         """
         Decorator to register a function with the engine.
 
@@ -216,8 +808,314 @@ class IterativeRecursionEngine:
                     next_function_to_call=None
                 )
 
+            @engine.register(successors=["my_func"])
+            def start(x: int) -> FunctionReturn:
+                ...
+
         :param func: Function to register
-        :return: The same function (for chaining)
+        :param successors: Names of the functions it may call next
+        :return: The same function (for chaining), or a decorator when called
+            with successors only
         """
-        self.add_function(func)
+        if func is None:
+            def decorator(func: Callable[..., FunctionReturn]) -> Callable[..., FunctionReturn]:
+                self.add_function(func, successors)
+                return func
+            return decorator
+
+        self.add_function(func, successors)
         return func
+
+    def mount(
+        self,
+        namespace: str,
+        engine: "IterativeRecursionEngine",
+        entry: str,
+        inputs: dict[str, str] | None = None,
+        outputs: dict[str, str] | None = None
+    ) -> int:
+        """
+        Mount another engine's functions as a sub-workflow.
+
+        The functions are copied into this engine as "namespace.name" and run
+        in its dispatch loop. They read and write their variables in this
+        engine's environment under the "namespace." prefix, so nothing is
+        copied between environments. A function enters the sub-workflow by
+        returning namespace as next_function_to_call, and resumes at its
+        return_to function once the sub-workflow finishes.
+
+        Example:
+            parent.mount(
+                "tax", tax_engine, entry="compute",
+                inputs={"amount": "subtotal"},  # tax.amount <- subtotal
+                outputs={"tax_due": "total_tax"}  # tax_due <- tax.total_tax
+            )
+
+            return FunctionReturn(
+                returned_values={"subtotal": subtotal},
+                next_function_to_call="tax",
+                return_to="checkout",
+                arg_env_mapping={"tax_due": "tax_due"}
+            )
+
+        :param namespace: Name used to call the sub-workflow and to prefix
+            its functions and variables. Must not contain ".".
+        :param engine: Engine whose registry is mounted. Functions added to it
+            later are not seen by this engine.
+        :param entry: Function of engine that starts the sub-workflow. It is
+            called with the input variables as arguments.
+        :param inputs: Sub-workflow variables to variables of the caller they
+            are bound to on entry.
+        :param outputs: Variables of the caller to sub-workflow variables they
+            are bound to on exit.
+        :return: The integer ID of the mount
+        :raises ValueError: If namespace is invalid or already in use, or if
+            entry belongs to a sub-workflow mounted into engine
+        :raises KeyError: If entry is not registered in engine
+        :raises RuntimeError: If this engine uses a frozen registry
+        """
+        self._check_registry_writable()
+        if not namespace or "." in namespace:
+            raise ValueError(
+                f"namespace must be a non-empty name without '.', got {namespace!r}"
+            )
+        existing_id = self._function_ids.get(namespace)
+        if existing_id is not None and (
+            self._function_table[existing_id] is not None or existing_id in self._mounts
+        ):
+            raise ValueError(f"'{namespace}' is already registered in this engine")
+        if engine is self:
+            raise ValueError("An engine cannot be mounted into itself")
+
+        entry_local_id = engine._lookup_function(entry)
+        if engine._function_scopes[entry_local_id] is not engine._root_scope:
+            raise engine._foreign_function(f"Mount '{namespace}'", entry_local_id)
+        prefix = namespace + "."
+
+        # Copy the registry of engine under the namespace, translating its
+        # IDs and scopes (including its own mounts) into this engine's
+        id_map = [
+            self._intern_function_name(prefix + name) for name in engine._function_names
+        ]
+        scopes: dict[int, _Scope] = {}
+
+        def translate_scope(source: _Scope) -> _Scope:
+            scope = scopes.get(id(source))
+            if scope is None:
+                local_id_map = (
+                    range(len(id_map)) if source.id_map is None else source.id_map
+                )
+                scope = _Scope(
+                    prefix=prefix + source.prefix,
+                    function_ids={
+                        name: id_map[local_id]
+                        for name, local_id in source.function_ids.items()
+                    },
+                    id_map=[id_map[local_id] for local_id in local_id_map]
+                )
+                scopes[id(source)] = scope
+            return scope
+
+        for local_id, function_id in enumerate(id_map):
+            source_scope = engine._function_scopes[local_id]
+            self._function_table[function_id] = engine._function_table[local_id]
+            self._function_scopes[function_id] = (
+                None if source_scope is None else translate_scope(source_scope)
+            )
+            local_successor_ids = engine._successor_ids[local_id]
+            self._successor_ids[function_id] = (
+                None if local_successor_ids is None
+                else frozenset(id_map[i] for i in local_successor_ids)
+            )
+
+        for local_id, local_mount in engine._mounts.items():
+            self._mounts[id_map[local_id]] = _Mount(
+                name=prefix + local_mount.name,
+                entry_id=id_map[local_mount.entry_id],
+                scope=translate_scope(local_mount.scope),
+                inputs=local_mount.inputs,
+                outputs=local_mount.outputs
+            )
+
+        mount_id = self._intern_function_name(namespace)
+        self._mounts[mount_id] = _Mount(
+            name=namespace,
+            entry_id=id_map[entry_local_id],
+            scope=translate_scope(engine._root_scope),
+            inputs=dict(inputs or {}),
+            outputs=dict(outputs or {})
+        )
+        # Entering the mount leads to its entry function
+        self._successor_ids[mount_id] = frozenset({id_map[entry_local_id]})
+        return mount_id
+
+    def function_id(self, name: str) -> int:
+        """
+        Look up the integer ID of a registered function.
+
+        Returning the ID as next_function_to_call skips the name lookup.
+
+        :param name: Function name
+        :return: The function ID
+        :raises KeyError: If the function is not registered
+        """
+        return self._lookup_function(name)
+
+    def transition_graph(self) -> dict[str, tuple[str, ...] | None]:
+        """
+        Return the declared successors of every known function.
+
+        Names declared as successors but never registered are included with
+        no successors of their own.
+
+        :return: Mapping of function name to its sorted successor names, or
+            None for functions that did not declare them
+        """
+        names = self._function_names
+        return {
+            name: None if ids is None else tuple(sorted(names[i] for i in ids))
+            for name, ids in zip(names, self._successor_ids)
+        }
+
+    def validate_transition_graph(self, entry: str | None = None) -> set[str]:
+        """
+        Check the static transition graph before running it.
+
+        :param entry: Function the run will start from. When given, functions
+            that cannot be reached from it are reported.
+        :return: Names of registered functions unreachable from entry. Empty
+            if entry is None, or if a reachable function did not declare its
+            successors (it could call anything).
+        :raises KeyError: If entry or a declared successor is not registered
+        """
+        missing = {
+            name for function_id, name in enumerate(self._function_names)
+            if self._function_table[function_id] is None and function_id not in self._mounts
+        }
+        if missing:
+            raise KeyError(
+                f"Declared successors are not registered: {missing}. "
+                f"Available functions: {set(self.functions_dict.keys())}"
+            )
+
+        if entry is None:
+            return set()
+
+        reachable = {self._lookup_function(entry)}
+        pending = list(reachable)
+        while pending:
+            successor_ids = self._successor_ids[pending.pop()]
+            if successor_ids is None:
+                return set()
+            for successor_id in successor_ids - reachable:
+                reachable.add(successor_id)
+                pending.append(successor_id)
+
+        return {
+            name for function_id, name in enumerate(self._function_names)
+            if function_id not in reachable
+        }
+
+    def transition_graph_to_json(self) -> str:
+        """
+        Export the transition graph as JSON.
+
+        :return: JSON object with one entry per function: its ID, name, whether
+            it is registered, whether it is a mounted sub-workflow, and its
+            declared successors (null if undeclared)
+        """
+        graph = self.transition_graph()
+        return json.dumps({
+            "functions": [
+                {
+                    "id": function_id,
+                    "name": name,
+                    "registered": (
+                        self._function_table[function_id] is not None
+                        or function_id in self._mounts
+                    ),
+                    "mount": function_id in self._mounts,
+                    "successors": None if graph[name] is None else list(graph[name])
+                }
+                for function_id, name in enumerate(self._function_names)
+            ]
+        }, indent=2)
+
+    def transition_graph_to_dot(self) -> str:
+        """
+        Export the transition graph in Graphviz dot format.
+
+        Functions without declared successors are drawn with a dashed border,
+        names declared as successors but not registered in red, and mounted
+        sub-workflows as boxes.
+
+        :return: The dot source
+        """
+        lines = ["digraph iterativerecursion {"]
+        for name, successors in self.transition_graph().items():
+            function_id = self._function_ids[name]
+            attributes = []
+            if function_id in self._mounts:
+                attributes.append("shape=box")
+            elif self._function_table[function_id] is None:
+                attributes.append("color=red")
+            if successors is None:
+                attributes.append("style=dashed")
+            suffix = f" [{', '.join(attributes)}]" if attributes else ""
+            lines.append(f"    {json.dumps(name)}{suffix};")
+            for successor in successors or ():
+                lines.append(f"    {json.dumps(name)} -> {json.dumps(successor)};")
+        lines.append("}")
+        return "\n".join(lines)
+
+    def _frozen_registry(self) -> "IterativeRecursionEngine":
+        """
+        Snapshot the function registry into read-only tables.
+
+        :return: New engine holding immutable copies of this engine's registry,
+            meant to be shared through _adopt_registry
+        """
+        frozen = IterativeRecursionEngine()
+        frozen._registry_frozen = True
+        frozen.functions_dict = MappingProxyType(dict(self.functions_dict))
+        frozen._function_ids = MappingProxyType(dict(self._function_ids))
+        frozen._function_names = tuple(self._function_names)
+        frozen._function_table = tuple(self._function_table)
+        frozen._successor_ids = tuple(self._successor_ids)
+        frozen._root_scope = _Scope(prefix="", function_ids=frozen._function_ids)
+        frozen._function_scopes = tuple(
+            frozen._root_scope if scope is self._root_scope else scope
+            for scope in self._function_scopes
+        )
+        frozen._mounts = MappingProxyType(dict(self._mounts))
+        return frozen
+
+    def _adopt_registry(self, source: "IterativeRecursionEngine") -> None:
+        """
+        Dispatch through the function registry of another engine.
+
+        :param source: Engine whose registry tables are shared, not copied
+        """
+        self.functions_dict = source.functions_dict
+        self._function_ids = source._function_ids
+        self._function_names = source._function_names
+        self._function_table = source._function_table
+        self._successor_ids = source._successor_ids
+        self._function_scopes = source._function_scopes
+        self._root_scope = source._root_scope
+        self._mounts = source._mounts
+        self._registry_frozen = source._registry_frozen
+
+    def _check_registry_writable(self) -> None:
+        """
+        Refuse to change a registry shared read-only with other engines.
+
+        :raises RuntimeError: If this engine uses a frozen registry
+        """
+        if self._registry_frozen:
+            raise RuntimeError(
+                "This engine shares a frozen function registry (e.g. it comes "
+                "from a RunPool) and cannot register functions or mount "
+                "sub-workflows. Do that on the template engine before "
+                "creating the pool."
+            )
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+import threading
+from collections.abc import Iterator, MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from iterativerecursion.iterativerecursion import IterativeRecursionEngine
+
+
+@dataclass
+class PoolStats:
+    """
+    Usage statistics of a RunPool.
+
+    Attributes:
+        created: Engines created, including pre-warmed ones.
+        acquired: Successful acquire() calls.
+        reused: Acquisitions served by an engine that had already been released.
+        waited: Acquisitions that had to wait for another run to release an engine.
+    """
+    created: int = 0
+    acquired: int = 0
+    reused: int = 0
+    waited: int = 0
+
+
+class RunPool:
+    """
+    Bounded pool of ready-to-run engines sharing one frozen function registry.
+
+    The registry of the template engine is copied once into a read-only
+    mapping that every pooled engine shares, so handing out an engine costs no
+    registration work. Engines are reset when released: their environment is
+    cleared in place and reused by the next run.
+
+    Example:
+        pool = RunPool(engine, max_size=16, prewarm=4)
+
+        with pool.run() as run_engine:
+            result = run_engine.start_function_caller(...)
+            answer = result["answer"]  # read before the engine is released
+
+        pool.close()  # or use the pool itself as a context manager
+
+    Pooled engines cannot register functions or mount sub-workflows; do that
+    on the template engine before creating the pool.
+    """
+    def __init__(
+        self,
+        engine: IterativeRecursionEngine,
+        max_size: int = 8,
+        prewarm: int = 0,
+        environment_factory: Callable[[], MutableMapping[str, Any]] | None = None
+    ):
+        """
+        :param engine: Template engine whose registered functions are shared.
+            Functions added to it later are not seen by the pool.
+        :param max_size: Maximum number of engines the pool creates.
+        :param prewarm: Number of engines to create up front.
+        :param environment_factory: Callable returning the environment mapping
+            of each pooled engine. Defaults to a plain dict.
+        :raises ValueError: If max_size or prewarm are out of range
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be >= 1, got {max_size}")
+        if not 0 <= prewarm <= max_size:
+            raise ValueError(
+                f"prewarm must be between 0 and max_size ({max_size}), got {prewarm}"
+            )
+
+        self.max_size = max_size
+        self.stats = PoolStats()
+        self._registry = engine._frozen_registry()
+        self._environment_factory = environment_factory
+        self._condition = threading.Condition()
+        self._idle: list[IterativeRecursionEngine] = []
+        self._members: set[IterativeRecursionEngine] = set()
+        self._released_before: set[IterativeRecursionEngine] = set()
+        self._closed = False
+
+        for _ in range(prewarm):
+            self._idle.append(self._create())
+
+    def _create(self) -> IterativeRecursionEngine:
+        """Build a pooled engine backed by the shared registry."""
+        environment = (
+            None if self._environment_factory is None else self._environment_factory()
+        )
+        engine = IterativeRecursionEngine(environment=environment)
+        engine._adopt_registry(self._registry)
+        self._members.add(engine)
+        self.stats.created += 1
+        return engine
+
+    @property
+    def size(self) -> int:
+        """Number of engines created so far."""
+        return len(self._members)
+
+    @property
+    def idle(self) -> int:
+        """Number of engines ready to be acquired without creating a new one."""
+        return len(self._idle)
+
+    def acquire(self, timeout: float | None = None) -> IterativeRecursionEngine:
+        """
+        Take an engine out of the pool.
+
+        An idle engine is preferred; otherwise a new one is created while the
+        pool is below max_size, and after that the call waits for a release.
+
+        :param timeout: Seconds to wait for a release. None waits forever.
+        :return: An engine with an empty environment
+        :raises TimeoutError: If no engine became available within timeout
+        :raises RuntimeError: If the pool is closed
+        """
+        with self._condition:
+            if not self._idle and not self._closed and len(self._members) >= self.max_size:
+                self.stats.waited += 1
+                if not self._condition.wait_for(
+                    lambda: self._idle or self._closed, timeout
+                ):
+                    raise TimeoutError(
+                        f"No engine released within {timeout} seconds. "
+                        f"All {self.max_size} pooled engines are in use."
+                    )
+
+            if self._closed:
+                raise RuntimeError("RunPool is closed")
+
+            if self._idle:
+                engine = self._idle.pop()
+                if engine in self._released_before:
+                    self.stats.reused += 1
+            else:
+                engine = self._create()
+
+            self.stats.acquired += 1
+            return engine
+
+    def release(self, engine: IterativeRecursionEngine) -> None:
+        """
+        Reset an engine and give it back to the pool.
+
+        Once the pool is closed, the engine's environment is closed instead.
+
+        :param engine: Engine previously returned by acquire()
+        :raises ValueError: If the engine does not belong to this pool or is
+            already idle
+        """
+        if engine not in self._members:
+            raise ValueError("Engine was not acquired from this pool")
+
+        with self._condition:
+            if engine in self._idle:
+                raise ValueError("Engine was already released")
+
+            engine.reset()
+            if self._closed:
+                _close_environment(engine)
+                return
+
+            self._released_before.add(engine)
+            self._idle.append(engine)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """
+        Close the pool and the environments of its idle engines.
+
+        Environments are closed if they have a close() method, e.g.
+        MmapEnvironment. Engines still in use are closed when released, and
+        acquire() raises RuntimeError from now on.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            # Wake up waiting acquire() calls so they fail
+            self._condition.notify_all()
+
+        for engine in idle:
+            _close_environment(engine)
+
+    @contextmanager
+    def run(self, timeout: float | None = None) -> Iterator[IterativeRecursionEngine]:
+        """
+        Acquire an engine for the duration of a with block.
+
+        :param timeout: Seconds to wait for a release. None waits forever.
+        :return: Context manager yielding the acquired engine
+        """
+        engine = self.acquire(timeout)
+        try:
+            yield engine
+        finally:
+            self.release(engine)
+
+    def __enter__(self) -> "RunPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(size={self.size}, idle={self.idle}, "
+            f"max_size={self.max_size}, closed={self._closed})"
+        )
+
+
+def _close_environment(engine: IterativeRecursionEngine) -> None:
+    """Close an engine's environment if its backend supports it."""
+    close = getattr(engine.environment_variables, "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark suite and its regression check.
+"""
+
+import json
+
+import pytest
+from benchmarks import CASES, find_regressions, run_benchmarks
+from benchmarks.__main__ import main
+
+
+def make_results(**engine_steps_per_sec: float) -> dict:
+    return {
+        "results": {
+            name: {"engine_steps_per_sec": value}
+            for name, value in engine_steps_per_sec.items()
+        }
+    }
+
+
+class TestRunBenchmarks:
+    """Test running the benchmark cases."""
+
+    def test_all_cases_run(self):
+        """Test that every case produces positive throughput numbers."""
+        results = run_benchmarks(steps=50, repeat=1)
+
+        assert set(results["results"]) == set(CASES)
+        for result in results["results"].values():
+            assert result["engine_steps_per_sec"] > 0
+            assert result["hand_loop_steps_per_sec"] > 0
+            assert result["overhead_vs_hand_loop"] > 0
+        assert results["results"]["deep_chain"]["recursion_steps_per_sec"] > 0
+
+    def test_steps_and_repeat_must_be_positive(self):
+        """Test that empty workloads are rejected instead of dividing by zero."""
+        with pytest.raises(ValueError, match="must be positive"):
+            run_benchmarks(["self_loop"], steps=0, repeat=1)
+        with pytest.raises(ValueError, match="must be positive"):
+            run_benchmarks(["self_loop"], steps=10, repeat=0)
+
+    def test_unknown_case(self):
+        """Test that unknown case names are rejected."""
+        with pytest.raises(KeyError, match="Unknown benchmark cases"):
+            run_benchmarks(["missing"], steps=10, repeat=1)
+
+
+class TestRegressions:
+    """Test the comparison against a stored baseline."""
+
+    def test_slowdown_within_threshold(self):
+        """Test that small slowdowns are tolerated."""
+        baseline = make_results(self_loop=100_000)
+        results = make_results(self_loop=95_000)
+
+        assert find_regressions(results, baseline, threshold=0.1) == []
+
+    def test_slowdown_past_threshold(self):
+        """Test that large slowdowns are reported."""
+        baseline = make_results(self_loop=100_000, deep_chain=100_000)
+        results = make_results(self_loop=80_000, deep_chain=120_000)
+
+        regressions = find_regressions(results, baseline, threshold=0.1)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("self_loop:")
+
+    def test_cases_missing_from_baseline_are_ignored(self):
+        """Test that new cases do not fail the comparison."""
+        baseline = make_results()
+        results = make_results(self_loop=1)
+
+        assert find_regressions(results, baseline, threshold=0.1) == []
+
+    def test_cli_fails_on_regression(self, tmp_path):
+        """Test that the CLI saves results and exits 1 on a regression."""
+        output = tmp_path / "results.json"
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps(make_results(self_loop=1e12)))
+
+        status = main([
+            "self_loop", "--steps", "20", "--repeat", "1",
+            "--output", str(output), "--baseline", str(baseline)
+        ])
+
+        assert status == 1
+        assert "self_loop" in json.loads(output.read_text())["results"]
+
+    def test_cli_rejects_invalid_counts(self, capsys):
+        """Test that the CLI rejects non-positive --steps and --repeat values."""
+        for option, value in [("--steps", "0"), ("--repeat", "-1"), ("--steps", "many")]:
+            with pytest.raises(SystemExit) as exit_info:
+                main(["self_loop", option, value])
+
+            assert exit_info.value.code == 2
+            assert option in capsys.readouterr().err
+
+    def test_cli_passes_without_regression(self, tmp_path):
+        """Test that the CLI exits 0 when throughput holds up."""
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps(make_results(self_loop=1)))
+
+        status = main([
+            "self_loop", "--steps", "20", "--repeat", "1", "--baseline", str(baseline)
+        ])
+
+        assert status == 0
@@ -3,10 +3,22 @@
 Tests for the IterativeRecursionEngine.
 """
 
+import array
+import enum
+import gc
+import json
+import os
+import threading
+import time
+
 import pytest
 from iterativerecursion import (
     IterativeRecursionEngine,
     FunctionReturn,
+    MmapEnvironment,
+    RunPool,
+    SamplingProfiler,
+    Thunk,
     VarsDict
 )
 
@@ -396,13 +408,13 @@ class TestRuntimeValidation:
         def bad_func(x: int) -> FunctionReturn:
             # Manually construct invalid dataclass
             ret = FunctionReturn(returned_values={})
-            ret.next_function_to_call = 123  # Wrong type
+            ret.next_function_to_call = 1.5  # Wrong type
             return ret
 
         executor = IterativeRecursionEngine()
         executor.add_function(bad_func)
 
-        with pytest.raises(TypeError, match="next_function_to_call must be str or None"):
+        with pytest.raises(TypeError, match="next_function_to_call must be str, int or None"):
             executor.start_function_caller(
                 next_function_to_call="bad_func",
                 environment_variables={"val": 1},
@@ -583,3 +595,1339 @@ class TestImprovedErrorMessages:
                 environment_variables={"val": 1},
                 arg_env_mapping={"x": "val"}
             )
+
+
+class TestMmapEnvironment:
+    """Test the memory-mapped environment backend."""
+
+    def test_small_values_stay_resident(self):
+        """Test that values under the threshold are kept in memory."""
+        with MmapEnvironment(size_threshold=16) as environment:
+            environment["count"] = 3
+            environment["small"] = b"abc"
+
+            assert not environment.is_spilled("count")
+            assert not environment.is_spilled("small")
+            assert environment["small"] == b"abc"
+
+    def test_large_bytes_are_spilled_and_viewed(self):
+        """Test that large buffers are spilled and read back as views."""
+        blob = bytes(range(256)) * 4
+
+        with MmapEnvironment(size_threshold=100) as environment:
+            environment["blob"] = blob
+
+            assert environment.is_spilled("blob")
+            view = environment["blob"]
+            assert isinstance(view, memoryview)
+            assert view.readonly
+            assert view == blob
+
+    def test_overwrite_and_delete_remove_spill_files(self):
+        """Test that replacing or deleting a spilled value frees its file."""
+        with MmapEnvironment(size_threshold=10) as environment:
+            environment["blob"] = b"x" * 100
+            first_path = environment._spilled["blob"].path
+
+            environment["blob"] = "now small"
+            assert not os.path.exists(first_path)
+            assert environment["blob"] == "now small"
+
+            environment["blob"] = b"y" * 100
+            second_path = environment._spilled["blob"].path
+            del environment["blob"]
+            assert not os.path.exists(second_path)
+            assert "blob" not in environment
+
+    def test_returned_view_reuses_spill_file(self):
+        """Test that storing a view the mapping handed out does not rewrite it."""
+        def carry(blob: memoryview, n: int) -> FunctionReturn:
+            if n == 0:
+                return FunctionReturn(returned_values={})
+            return FunctionReturn(
+                returned_values={"blob": blob, "n": n - 1},
+                next_function_to_call="carry"
+            )
+
+        with MmapEnvironment(size_threshold=1024) as environment:
+            executor = IterativeRecursionEngine(environment=environment)
+            executor.add_function(carry)
+            executor.start_function_caller(
+                next_function_to_call="carry",
+                environment_variables={"blob": bytes(1 << 20), "n": 50},
+                arg_env_mapping={"blob": "blob", "n": "n"}
+            )
+
+            assert environment._file_counter == 1
+            assert len(os.listdir(environment._directory)) == 1
+
+    def test_returned_forced_thunk_reuses_spill_file(self):
+        """Test that a step returning a forced Thunk's value does not rewrite it."""
+        received = []
+
+        def use(t: memoryview) -> FunctionReturn:
+            received.append(t)
+            return FunctionReturn(returned_values={"u": t})
+
+        with MmapEnvironment(size_threshold=10) as environment:
+            executor = IterativeRecursionEngine(environment=environment)
+            executor.add_function(use)
+            executor.start_function_caller(
+                next_function_to_call="use",
+                environment_variables={"t": Thunk(lambda: b"x" * 100)},
+                arg_env_mapping={"t": "t"}
+            )
+
+            assert isinstance(received[0], memoryview)
+            assert environment._spilled["u"].path == environment._spilled["t"].path
+            assert len(os.listdir(environment._directory)) == 1
+
+    def test_shared_spill_file_deleted_with_last_key(self):
+        """Test that a file shared by two keys lives until both are gone."""
+        with MmapEnvironment(size_threshold=10) as environment:
+            environment["a"] = b"x" * 100
+            environment["b"] = environment["a"]
+            path = environment._spilled["a"].path
+
+            assert environment._spilled["b"].path == path
+            del environment["a"]
+            assert os.path.exists(path)
+            assert environment["b"] == b"x" * 100
+            del environment["b"]
+            assert not os.path.exists(path)
+
+    def test_alias_shares_stored_value(self):
+        """Test that alias binds a key to another key's value without copying it."""
+        payload = ["resident"]
+
+        with MmapEnvironment(size_threshold=10) as environment:
+            environment["blob"] = b"x" * 100
+            environment["small"] = payload
+            environment.alias("copy", "blob")
+            environment.alias("ref", "small")
+            path = environment._spilled["blob"].path
+
+            assert environment._file_counter == 1
+            assert environment._spilled["copy"].path == path
+            assert environment["ref"] is payload
+            environment.alias("copy", "small")
+            del environment["blob"]
+            assert not os.path.exists(path)
+            with pytest.raises(KeyError):
+                environment.alias("other", "missing")
+
+    def test_close_removes_directory(self):
+        """Test that closing the environment removes the spill directory."""
+        environment = MmapEnvironment(size_threshold=0)
+        environment["blob"] = b"data"
+        directory = environment._directory
+
+        environment.close()
+
+        assert not os.path.exists(directory)
+        assert len(environment) == 0
+
+    def test_unclosed_environment_removes_directory(self):
+        """Test that the spill directory is removed when the environment is collected."""
+        environment = MmapEnvironment(size_threshold=0)
+        environment["blob"] = b"data"
+        directory = environment._directory
+
+        del environment
+        gc.collect()
+
+        assert not os.path.exists(directory)
+
+    def test_numpy_arrays_round_trip(self):
+        """Test that NumPy arrays come back as read-only zero-copy arrays."""
+        numpy = pytest.importorskip("numpy")
+        array = numpy.arange(1000, dtype=numpy.int64).reshape(10, 100)
+
+        with MmapEnvironment(size_threshold=100) as environment:
+            environment["array"] = array[:, ::2]
+
+            loaded = environment["array"]
+            assert environment.is_spilled("array")
+            assert loaded.shape == (10, 50)
+            assert not loaded.flags.writeable
+            assert (loaded == array[:, ::2]).all()
+
+    def test_typed_buffers_keep_format_and_shape(self):
+        """Test that typed buffers come back with their item format and shape."""
+        values = array.array("d", range(100))
+
+        with MmapEnvironment(size_threshold=100) as environment:
+            environment["values"] = values
+            environment["matrix"] = memoryview(bytes(range(200))).cast("B", [10, 20])
+
+            loaded = environment["values"]
+            assert environment.is_spilled("values")
+            assert loaded.format == "d"
+            assert len(loaded) == 100
+            assert loaded[99] == 99.0
+
+            matrix = environment["matrix"]
+            assert matrix.shape == (10, 20)
+            assert matrix[1, 2] == 22
+
+    def test_non_contiguous_buffers_stay_resident(self):
+        """Test that non-contiguous views are kept in memory without spill files."""
+        strided = memoryview(bytes(1000))[::2]
+
+        with MmapEnvironment(size_threshold=10) as environment:
+            environment["strided"] = strided
+
+            assert not environment.is_spilled("strided")
+            assert environment["strided"] is strided
+            assert os.listdir(environment._directory) == []
+
+    def test_object_and_structured_arrays_stay_resident(self):
+        """Test that arrays a flat file cannot round-trip are kept in memory."""
+        numpy = pytest.importorskip("numpy")
+        objects = numpy.array([{"a": i} for i in range(100)], dtype=object)
+        records = numpy.zeros(100, dtype=[("x", "i4"), ("y", "f8")])
+
+        with MmapEnvironment(size_threshold=10) as environment:
+            environment["objects"] = objects
+            environment["records"] = records
+
+            assert not environment.is_spilled("objects")
+            assert not environment.is_spilled("records")
+            assert environment["objects"][5] == {"a": 5}
+            assert environment["records"].dtype.names == ("x", "y")
+
+    def test_engine_with_mmap_environment(self):
+        """Test that functions receive spilled values through the engine."""
+        sizes = []
+
+        def produce(n: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"payload": b"z" * n},
+                next_function_to_call="consume"
+            )
+
+        def consume(payload: memoryview) -> FunctionReturn:
+            sizes.append(len(payload))
+            return FunctionReturn(
+                returned_values={"first": payload[0]}
+            )
+
+        with MmapEnvironment(size_threshold=64) as environment:
+            executor = IterativeRecursionEngine(environment=environment)
+            executor.add_function(produce)
+            executor.add_function(consume)
+            result = executor.start_function_caller(
+                next_function_to_call="produce",
+                environment_variables={"n": 1000},
+                arg_env_mapping={"n": "n"}
+            )
+
+            assert result is environment
+            assert environment.is_spilled("payload")
+            assert sizes == [1000]
+            assert result["first"] == ord("z")
+
+
+class TestThunks:
+    """Test lazily evaluated environment values."""
+
+    def test_thunk_evaluated_once_when_bound(self):
+        """Test that a thunk runs once, when a function first reads it."""
+        calls = []
+
+        def expensive() -> int:
+            calls.append("expensive")
+            return 42
+
+        def produce() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"value": Thunk(expensive)},
+                next_function_to_call="read_twice",
+                arg_env_mapping={"x": "value"}
+            )
+
+        def read_twice(x: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"first": x},
+                next_function_to_call="read_again",
+                arg_env_mapping={"y": "value"}
+            )
+
+        def read_again(y: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"second": y}
+            )
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(produce)
+        executor.add_function(read_twice)
+        executor.add_function(read_again)
+        result = executor.start_function_caller(
+            next_function_to_call="produce",
+            environment_variables={},
+            arg_env_mapping={}
+        )
+
+        assert calls == ["expensive"]
+        assert result["value"] == 42
+        assert result["first"] == result["second"] == 42
+        assert executor.stats.thunks_evaluated == 1
+        assert executor.stats.thunks_skipped == 0
+
+    def test_unread_thunks_are_freed(self):
+        """Test that thunks nobody reads are skipped and dropped."""
+        def never_called() -> int:
+            raise AssertionError("thunk should not be evaluated")
+
+        def produce(n: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"n": n + 1, "unused": Thunk(never_called)}
+            )
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(produce)
+        result = executor.start_function_caller(
+            next_function_to_call="produce",
+            environment_variables={"n": 1},
+            arg_env_mapping={"n": "n"}
+        )
+
+        assert "unused" not in result
+        assert result["n"] == 2
+        assert executor.stats.thunks_evaluated == 0
+        assert executor.stats.thunks_skipped == 1
+
+    def test_overwritten_thunks_are_not_counted(self):
+        """Test that only unread thunks left when the run ends count as skipped."""
+        def loop(n: int) -> FunctionReturn:
+            if n == 0:
+                return FunctionReturn(returned_values={})
+            return FunctionReturn(
+                returned_values={"n": n - 1, "cache": Thunk(lambda: n * 2)},
+                next_function_to_call="loop",
+                arg_env_mapping={"n": "n"}
+            )
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(loop)
+        executor.start_function_caller(
+            next_function_to_call="loop",
+            environment_variables={"n": 5},
+            arg_env_mapping={"n": "n"}
+        )
+
+        assert executor.stats.thunks_evaluated == 0
+        assert executor.stats.thunks_skipped == 1
+        assert "cache" not in executor.environment_variables
+
+    def test_failing_thunk_is_not_counted_as_evaluated(self):
+        """Test that a thunk whose compute callable raises counts only as skipped."""
+        def consume(x: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(consume)
+
+        with pytest.raises(ZeroDivisionError):
+            executor.start_function_caller(
+                next_function_to_call="consume",
+                environment_variables={"x": Thunk(lambda: 1 / 0)},
+                arg_env_mapping={"x": "x"}
+            )
+
+        assert executor.stats.thunks_evaluated == 0
+        assert executor.stats.thunks_skipped == 1
+        assert "x" not in executor.environment_variables
+
+    def test_thunk_as_initial_variable(self):
+        """Test that thunks passed to start_function_caller are lazy too."""
+        def consume(x: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"doubled": x * 2}
+            )
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(consume)
+        result = executor.start_function_caller(
+            next_function_to_call="consume",
+            environment_variables={"x": Thunk(lambda: 21)},
+            arg_env_mapping={"x": "x"}
+        )
+
+        assert result["doubled"] == 42
+        assert executor.stats.thunks_evaluated == 1
+
+    def test_nested_run_keeps_outer_thunks(self):
+        """Test that a nested run on the same engine leaves outer thunks alone."""
+        executor = IterativeRecursionEngine()
+
+        @executor.register
+        def outer() -> FunctionReturn:
+            executor.start_function_caller(
+                next_function_to_call="inner",
+                environment_variables={"seed": 1},
+                arg_env_mapping={"seed": "seed"}
+            )
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="consume",
+                arg_env_mapping={"value": "lazy"}
+            )
+
+        @executor.register
+        def inner(seed: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={"inner_done": seed})
+
+        @executor.register
+        def consume(value: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={"consumed": value})
+
+        result = executor.start_function_caller(
+            next_function_to_call="outer",
+            environment_variables={"lazy": Thunk(lambda: 5)},
+            arg_env_mapping={}
+        )
+
+        assert result["consumed"] == 5
+        assert result["inner_done"] == 1
+        assert executor.stats.thunks_evaluated == 1
+        assert executor.current_function is None
+
+    def test_stats_reset_per_run(self):
+        """Test that each run starts with fresh statistics."""
+        def consume(x: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(consume)
+        executor.start_function_caller(
+            next_function_to_call="consume",
+            environment_variables={"x": Thunk(lambda: 1)},
+            arg_env_mapping={"x": "x"}
+        )
+        executor.start_function_caller(
+            next_function_to_call="consume",
+            environment_variables={},
+            arg_env_mapping={"x": "x"}
+        )
+
+        assert executor.stats.thunks_evaluated == 0
+        assert executor.stats.thunks_skipped == 0
+
+
+class TestRunPool:
+    """Test the pool of pre-initialized engines."""
+
+    @staticmethod
+    def make_template() -> IterativeRecursionEngine:
+        def double(x: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"result": x * 2}
+            )
+
+        template = IterativeRecursionEngine()
+        template.add_function(double)
+        return template
+
+    def test_pooled_engine_runs_and_resets(self):
+        """Test that released engines come back empty and get reused."""
+        pool = RunPool(self.make_template(), max_size=2)
+
+        with pool.run() as engine:
+            result = engine.start_function_caller(
+                next_function_to_call="double",
+                environment_variables={"x": 21},
+                arg_env_mapping={"x": "x"}
+            )
+            assert result["result"] == 42
+            first = engine
+
+        with pool.run() as engine:
+            assert engine is first
+            assert engine.environment_variables == {}
+
+        assert pool.stats.created == 1
+        assert pool.stats.acquired == 2
+        assert pool.stats.reused == 1
+
+    def test_prewarm_and_shared_frozen_registry(self):
+        """Test that prewarmed engines share a read-only registry."""
+        pool = RunPool(self.make_template(), max_size=3, prewarm=2)
+
+        assert pool.size == 2
+        assert pool.idle == 2
+
+        first = pool.acquire()
+        second = pool.acquire()
+        assert first.functions_dict is second.functions_dict
+        with pytest.raises(RuntimeError, match="frozen function registry"):
+            first.add_function(lambda: None)
+        with pytest.raises(RuntimeError, match="frozen function registry"):
+            first.mount("sub", IterativeRecursionEngine(), entry="missing")
+
+        pool.release(first)
+        pool.release(second)
+        assert pool.stats.reused == 0
+
+    def test_release_resets_after_failed_run(self):
+        """Test that an engine is reset even when its run raised."""
+        pool = RunPool(self.make_template(), max_size=1)
+
+        with pytest.raises(KeyError):
+            with pool.run() as engine:
+                engine.start_function_caller(
+                    next_function_to_call="double",
+                    environment_variables={"y": 1},
+                    arg_env_mapping={"x": "x"}
+                )
+
+        assert pool.acquire().environment_variables == {}
+
+    def test_bounded_size_times_out(self):
+        """Test that the pool never grows past max_size."""
+        pool = RunPool(self.make_template(), max_size=1)
+        engine = pool.acquire()
+
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.01)
+
+        pool.release(engine)
+        assert pool.size == 1
+        assert pool.stats.waited == 1
+
+    def test_waiting_acquire_gets_released_engine(self):
+        """Test that a blocked acquire resumes when an engine is released."""
+        pool = RunPool(self.make_template(), max_size=1)
+        engine = pool.acquire()
+        acquired = []
+
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+        waiter.start()
+        pool.release(engine)
+        waiter.join()
+
+        assert acquired == [engine]
+
+    def test_release_rejects_foreign_and_double_release(self):
+        """Test that only engines acquired from the pool can be released once."""
+        pool = RunPool(self.make_template(), max_size=1)
+
+        with pytest.raises(ValueError, match="not acquired from this pool"):
+            pool.release(IterativeRecursionEngine())
+
+        engine = pool.acquire()
+        pool.release(engine)
+        with pytest.raises(ValueError, match="already released"):
+            pool.release(engine)
+
+    def test_environment_factory(self):
+        """Test that pooled engines use the configured environment backend."""
+        environments = []
+
+        def factory() -> MmapEnvironment:
+            environment = MmapEnvironment(size_threshold=8)
+            environments.append(environment)
+            return environment
+
+        with RunPool(self.make_template(), max_size=1, environment_factory=factory) as pool:
+            with pool.run() as engine:
+                assert engine.environment_variables is environments[0]
+            directory = environments[0]._directory
+            assert os.path.exists(directory)
+
+        assert not os.path.exists(directory)
+
+    def test_close_handles_engines_in_use(self):
+        """Test that closing closes busy engines on release and rejects acquire."""
+        closed = []
+
+        class ClosableEnvironment(dict):
+            def close(self) -> None:
+                closed.append(self)
+
+        pool = RunPool(
+            self.make_template(), max_size=2, environment_factory=ClosableEnvironment
+        )
+        busy = pool.acquire()
+        pool.release(pool.acquire())
+
+        pool.close()
+        assert len(closed) == 1
+
+        pool.release(busy)
+        assert len(closed) == 2
+        assert pool.idle == 0
+        with pytest.raises(RuntimeError, match="closed"):
+            pool.acquire()
+
+    def test_close_wakes_waiting_acquire(self):
+        """Test that a blocked acquire fails once the pool is closed."""
+        pool = RunPool(self.make_template(), max_size=1)
+        pool.acquire()
+        errors = []
+
+        def wait() -> None:
+            try:
+                pool.acquire(timeout=5)
+            except RuntimeError as error:
+                errors.append(error)
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.01)
+        pool.close()
+        waiter.join()
+
+        assert len(errors) == 1
+
+
+class TestTransitionGraph:
+    """Test integer function IDs and declared successors."""
+
+    def test_dispatch_by_function_id(self):
+        """Test that functions can return IDs instead of names."""
+        executor = IterativeRecursionEngine()
+
+        @executor.register
+        def countdown(n: int) -> FunctionReturn:
+            if n == 0:
+                return FunctionReturn(returned_values={"done": True})
+            return FunctionReturn(
+                returned_values={"n": n - 1},
+                next_function_to_call=countdown_id
+            )
+
+        countdown_id = executor.function_id("countdown")
+        result = executor.start_function_caller(
+            next_function_to_call=countdown_id,
+            environment_variables={"n": 3},
+            arg_env_mapping={"n": "n"}
+        )
+
+        assert result["done"] is True
+        assert result["n"] == 0
+
+    def test_dispatch_by_int_enum_id(self):
+        """Test that int subclasses such as IntEnum members work as IDs."""
+        executor = IterativeRecursionEngine()
+
+        @executor.register
+        def first() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call=Step.SECOND
+            )
+
+        @executor.register
+        def second() -> FunctionReturn:
+            return FunctionReturn(returned_values={"done": True})
+
+        Step = enum.IntEnum(
+            "Step",
+            {"FIRST": executor.function_id("first"), "SECOND": executor.function_id("second")}
+        )
+
+        result = executor.start_function_caller(
+            next_function_to_call=Step.FIRST,
+            environment_variables={},
+            arg_env_mapping={}
+        )
+
+        assert result["done"] is True
+
+    def test_add_function_returns_stable_ids(self):
+        """Test that re-registering a name keeps its ID."""
+        def step() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+        first_id = executor.add_function(step)
+        second_id = executor.add_function(step)
+
+        assert first_id == second_id == executor.function_id("step")
+
+    def test_unknown_function_id_raises(self):
+        """Test that an unregistered ID raises KeyError."""
+        def jump() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call=99
+            )
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(jump)
+
+        with pytest.raises(KeyError, match="ID 99 not found"):
+            executor.start_function_caller(
+                next_function_to_call="jump",
+                environment_variables={},
+                arg_env_mapping={}
+            )
+
+    def test_undeclared_successor_raises(self):
+        """Test that calling a function outside the declared successors fails."""
+        executor = IterativeRecursionEngine()
+
+        @executor.register(successors=["finish"])
+        def start() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="other"
+            )
+
+        @executor.register
+        def finish() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        @executor.register
+        def other() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        with pytest.raises(ValueError, match="not one of its declared successors"):
+            executor.start_function_caller(
+                next_function_to_call="start",
+                environment_variables={},
+                arg_env_mapping={}
+            )
+
+    def test_validate_reports_missing_and_unreachable(self):
+        """Test up-front detection of missing and unreachable functions."""
+        def start() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        def middle() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        def orphan() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        def end() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(start, successors=["middle"])
+        executor.add_function(middle, successors=["end", "start"])
+        executor.add_function(orphan, successors=[])
+
+        with pytest.raises(KeyError, match="not registered"):
+            executor.validate_transition_graph("start")
+
+        executor.add_function(end, successors=[])
+
+        assert executor.validate_transition_graph("start") == {"orphan"}
+        assert executor.validate_transition_graph() == set()
+
+    def test_undeclared_successors_make_everything_reachable(self):
+        """Test that a function without declarations could reach anything."""
+        def start() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        def other() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(start)
+        executor.add_function(other, successors=[])
+
+        assert executor.validate_transition_graph("start") == set()
+
+    def test_graph_exports(self):
+        """Test the JSON and dot exports of the transition graph."""
+        def start() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+        executor.add_function(start, successors=["later"])
+
+        assert executor.transition_graph() == {"start": ("later",), "later": None}
+
+        exported = json.loads(executor.transition_graph_to_json())
+        assert exported["functions"] == [
+            {"id": 0, "name": "start", "registered": True, "mount": False,
+             "successors": ["later"]},
+            {"id": 1, "name": "later", "registered": False, "mount": False,
+             "successors": None},
+        ]
+
+        dot = executor.transition_graph_to_dot()
+        assert dot.startswith("digraph iterativerecursion {")
+        assert '"start" -> "later";' in dot
+        assert '"later" [color=red, style=dashed];' in dot
+
+    def test_successors_must_be_names(self):
+        """Test that successors are validated at registration."""
+        def start() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        executor = IterativeRecursionEngine()
+
+        with pytest.raises(TypeError, match="successors must be function names"):
+            executor.add_function(start, successors=[1])
+
+
+class TestSubWorkflows:
+    """Test mounting engines as inline sub-workflows."""
+
+    @staticmethod
+    def make_factorial_engine() -> IterativeRecursionEngine:
+        engine = IterativeRecursionEngine()
+
+        @engine.register(successors=["step"])
+        def start(n: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"n": n, "acc": 1},
+                next_function_to_call="step"
+            )
+
+        @engine.register(successors=["step"])
+        def step(n: int, acc: int) -> FunctionReturn:
+            if n <= 1:
+                return FunctionReturn(returned_values={"result": acc})
+            return FunctionReturn(
+                returned_values={"n": n - 1, "acc": acc * n},
+                next_function_to_call=step_id
+            )
+
+        step_id = engine.function_id("step")
+        return engine
+
+    def test_call_and_resume(self):
+        """Test that a sub-workflow runs inline and its caller resumes."""
+        parent = IterativeRecursionEngine()
+        parent.mount(
+            "fact", self.make_factorial_engine(), entry="start",
+            inputs={"n": "number"}, outputs={"factorial": "result"}
+        )
+
+        @parent.register(successors=["fact", "report"])
+        def begin(number: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="fact",
+                return_to="report",
+                arg_env_mapping={"value": "factorial"}
+            )
+
+        @parent.register
+        def report(value: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={"report": f"5! = {value}"})
+
+        result = parent.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={"number": 5},
+            arg_env_mapping={"number": "number"}
+        )
+
+        assert result["report"] == "5! = 120"
+        assert result["factorial"] == 120
+        # Sub-workflow variables live in the same environment, namespaced
+        assert result["fact.n"] == 1
+        assert "n" not in result
+
+    def test_inputs_are_not_copied(self):
+        """Test that inputs and outputs are bound by reference."""
+        payload = ["shared"]
+
+        sub = IterativeRecursionEngine()
+
+        @sub.register
+        def passthrough(data: list) -> FunctionReturn:
+            return FunctionReturn(returned_values={"out": data})
+
+        parent = IterativeRecursionEngine()
+        parent.mount(
+            "sub", sub, entry="passthrough",
+            inputs={"data": "payload"}, outputs={"echo": "out"}
+        )
+
+        @parent.register
+        def begin() -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="sub")
+
+        result = parent.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={"payload": payload},
+            arg_env_mapping={}
+        )
+
+        assert result["echo"] is payload
+        assert result["sub.data"] is payload
+
+    @staticmethod
+    def make_lazy_parent(consume: bool) -> IterativeRecursionEngine:
+        sub = IterativeRecursionEngine()
+
+        @sub.register
+        def produce() -> FunctionReturn:
+            return FunctionReturn(returned_values={"t": Thunk(lambda: 7)})
+
+        parent = IterativeRecursionEngine()
+        parent.mount("s", sub, entry="produce", outputs={"x": "t"})
+
+        @parent.register(successors=["s", "use"])
+        def begin() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="s",
+                return_to="use" if consume else None,
+                arg_env_mapping={"x": "x"}
+            )
+
+        @parent.register
+        def use(x: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={"y": x + 1})
+
+        return parent
+
+    def test_output_thunk_forced_under_every_key(self):
+        """Test that forcing an output-mapped Thunk replaces both of its keys."""
+        parent = self.make_lazy_parent(consume=True)
+
+        result = parent.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={},
+            arg_env_mapping={}
+        )
+
+        assert result == {"s.t": 7, "x": 7, "y": 8}
+        assert parent.stats.thunks_evaluated == 1
+        assert parent.stats.thunks_skipped == 0
+
+    def test_forced_output_thunk_spilled_once(self):
+        """Test that a large forced Thunk shares one spill file across its keys."""
+        sub = IterativeRecursionEngine()
+
+        @sub.register
+        def produce() -> FunctionReturn:
+            return FunctionReturn(returned_values={"t": Thunk(lambda: bytes(1 << 16))})
+
+        environment = MmapEnvironment(size_threshold=1024)
+        parent = IterativeRecursionEngine(environment=environment)
+        parent.mount("s", sub, entry="produce", outputs={"x": "t"})
+
+        @parent.register(successors=["s", "use"])
+        def begin() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="s",
+                return_to="use",
+                arg_env_mapping={"x": "x"}
+            )
+
+        @parent.register
+        def use(x: memoryview) -> FunctionReturn:
+            return FunctionReturn(returned_values={"size": len(x)})
+
+        with environment:
+            parent.start_function_caller(
+                next_function_to_call="begin",
+                environment_variables={},
+                arg_env_mapping={}
+            )
+
+            assert environment["size"] == 1 << 16
+            assert environment.is_spilled("s.t") and environment.is_spilled("x")
+            assert environment._file_counter == 1
+
+    def test_unread_output_thunk_skipped_once(self):
+        """Test that a Thunk bound under two keys counts as one skipped Thunk."""
+        parent = self.make_lazy_parent(consume=False)
+
+        result = parent.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={},
+            arg_env_mapping={}
+        )
+
+        assert result == {}
+        assert parent.stats.thunks_evaluated == 0
+        assert parent.stats.thunks_skipped == 1
+
+    def test_mapped_spilled_values_share_one_file(self):
+        """Test that entering and leaving a mount does not copy spilled values."""
+        sub = IterativeRecursionEngine()
+
+        @sub.register
+        def passthrough(data: memoryview) -> FunctionReturn:
+            return FunctionReturn(returned_values={"size": len(data)})
+
+        environment = MmapEnvironment(size_threshold=1024)
+        parent = IterativeRecursionEngine(environment=environment)
+        parent.mount(
+            "sub", sub, entry="passthrough",
+            inputs={"data": "blob"}, outputs={"echo": "data"}
+        )
+
+        @parent.register
+        def begin() -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="sub")
+
+        with environment:
+            parent.start_function_caller(
+                next_function_to_call="begin",
+                environment_variables={"blob": bytes(1 << 16)},
+                arg_env_mapping={}
+            )
+
+            assert environment["sub.size"] == 1 << 16
+            assert environment._file_counter == 1
+            assert len(os.listdir(environment._directory)) == 1
+            assert environment.is_spilled("sub.data")
+            assert environment.is_spilled("echo")
+
+    def test_nested_mounts(self):
+        """Test that mounted engines can contain mounts of their own."""
+        middle = IterativeRecursionEngine()
+        middle.mount(
+            "fact", self.make_factorial_engine(), entry="start",
+            inputs={"n": "k"}, outputs={"k_fact": "result"}
+        )
+
+        @middle.register
+        def enter(k: int) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="fact",
+                return_to="double",
+                arg_env_mapping={"value": "k_fact"}
+            )
+
+        @middle.register
+        def double(value: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={"doubled": value * 2})
+
+        outer = IterativeRecursionEngine()
+        outer.mount(
+            "mid", middle, entry="enter",
+            inputs={"k": "x"}, outputs={"answer": "doubled"}
+        )
+
+        @outer.register
+        def begin(x: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="mid")
+
+        result = outer.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={"x": 4},
+            arg_env_mapping={"x": "x"}
+        )
+
+        assert result["answer"] == 48
+        assert result["mid.fact.result"] == 24
+        assert "mid.fact.step" in outer.transition_graph()
+
+    def test_sub_workflow_ids_are_local(self):
+        """Test that IDs returned inside a sub-workflow refer to its own functions."""
+        parent = IterativeRecursionEngine()
+
+        @parent.register
+        def step() -> FunctionReturn:
+            raise AssertionError("parent step must not be called")
+
+        parent.mount(
+            "fact", self.make_factorial_engine(), entry="start",
+            inputs={"n": "n"}, outputs={"result": "result"}
+        )
+
+        @parent.register
+        def begin(n: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="fact")
+
+        result = parent.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={"n": 6},
+            arg_env_mapping={"n": "n"}
+        )
+
+        assert result["result"] == 720
+
+    def test_missing_output_variable(self):
+        """Test that a missing output variable raises KeyError on exit."""
+        sub = IterativeRecursionEngine()
+
+        @sub.register
+        def noop() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        parent = IterativeRecursionEngine()
+        parent.mount("sub", sub, entry="noop", outputs={"value": "never_set"})
+
+        @parent.register
+        def begin() -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="sub")
+
+        with pytest.raises(KeyError, match="Sub-workflow 'sub' maps environment variables"):
+            parent.start_function_caller(
+                next_function_to_call="begin",
+                environment_variables={},
+                arg_env_mapping={}
+            )
+
+    def test_mounted_functions_not_callable_directly(self):
+        """Test that a caller cannot jump into a sub-workflow's functions."""
+        parent = IterativeRecursionEngine()
+        parent.mount(
+            "fact", self.make_factorial_engine(), entry="start",
+            inputs={"n": "number"}, outputs={"factorial": "result"}
+        )
+        step_id = parent.function_id("fact.step")
+
+        @parent.register
+        def begin(target: str | int) -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call=target)
+
+        @parent.register
+        def detour() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call="fact",
+                return_to="fact.step"
+            )
+
+        for target in ("fact.step", step_id):
+            with pytest.raises(ValueError, match="belongs to a mounted sub-workflow"):
+                parent.start_function_caller(
+                    next_function_to_call="begin",
+                    environment_variables={"target": target, "number": 3},
+                    arg_env_mapping={"target": "target"}
+                )
+
+        with pytest.raises(ValueError, match="Call the sub-workflow by its namespace"):
+            parent.start_function_caller(
+                next_function_to_call="detour",
+                environment_variables={"number": 3},
+                arg_env_mapping={}
+            )
+
+        with pytest.raises(ValueError, match="'fact.step' directly"):
+            parent.start_function_caller(
+                next_function_to_call="fact.step",
+                environment_variables={"n": 3, "acc": 1},
+                arg_env_mapping={"n": "n", "acc": "acc"}
+            )
+
+        with pytest.raises(ValueError, match="belongs to a mounted sub-workflow"):
+            IterativeRecursionEngine().mount("outer", parent, entry="fact.start")
+
+    def test_return_to_requires_sub_workflow_call(self):
+        """Test that return_to is rejected unless the call enters a mount."""
+        executor = IterativeRecursionEngine()
+
+        @executor.register
+        def begin(target: str | None) -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={},
+                next_function_to_call=target,
+                return_to="nonexistent"
+            )
+
+        @executor.register
+        def other() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        for target in ("other", None):
+            with pytest.raises(ValueError, match="requires next_function_to_call"):
+                executor.start_function_caller(
+                    next_function_to_call="begin",
+                    environment_variables={"target": target},
+                    arg_env_mapping={"target": "target"}
+                )
+
+    def test_mount_validation(self):
+        """Test that invalid mounts are rejected."""
+        parent = IterativeRecursionEngine()
+
+        @parent.register
+        def taken() -> FunctionReturn:
+            return FunctionReturn(returned_values={})
+
+        sub = self.make_factorial_engine()
+
+        with pytest.raises(ValueError, match="without '.'"):
+            parent.mount("a.b", sub, entry="start")
+        with pytest.raises(ValueError, match="already registered"):
+            parent.mount("taken", sub, entry="start")
+        with pytest.raises(KeyError):
+            parent.mount("fact", sub, entry="missing")
+        with pytest.raises(ValueError, match="cannot be mounted into itself"):
+            parent.mount("self", parent, entry="taken")
+
+    def test_mount_in_transition_graph(self):
+        """Test that mounts appear in the graph and can be declared successors."""
+        parent = IterativeRecursionEngine()
+
+        @parent.register(successors=["fact"])
+        def begin() -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="fact")
+
+        parent.mount("fact", self.make_factorial_engine(), entry="start")
+
+        assert parent.transition_graph()["fact"] == ("fact.start",)
+        assert parent.validate_transition_graph("begin") == set()
+        assert '"fact" [shape=box];' in parent.transition_graph_to_dot()
+
+    def test_pooled_engines_keep_mounts(self):
+        """Test that RunPool engines can call mounted sub-workflows."""
+        parent = IterativeRecursionEngine()
+        parent.mount(
+            "fact", self.make_factorial_engine(), entry="start",
+            inputs={"n": "n"}, outputs={"result": "result"}
+        )
+
+        @parent.register
+        def begin(n: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="fact")
+
+        pool = RunPool(parent, max_size=1)
+        with pool.run() as engine:
+            result = engine.start_function_caller(
+                next_function_to_call="begin",
+                environment_variables={"n": 3},
+                arg_env_mapping={"n": "n"}
+            )
+            assert result["result"] == 6
+
+
+class TestSamplingProfiler:
+    """Test the sampling profiler."""
+
+    def test_current_function_slot(self):
+        """Test that the engine exposes the function being executed."""
+        seen = []
+        executor = IterativeRecursionEngine()
+
+        @executor.register
+        def first() -> FunctionReturn:
+            seen.append(executor.current_function)
+            return FunctionReturn(returned_values={}, next_function_to_call="second")
+
+        @executor.register
+        def second() -> FunctionReturn:
+            seen.append(executor.current_function)
+            return FunctionReturn(returned_values={})
+
+        executor.start_function_caller(
+            next_function_to_call="first",
+            environment_variables={},
+            arg_env_mapping={}
+        )
+
+        assert seen == ["first", "second"]
+        assert executor.current_function is None
+
+    def test_histogram_of_slow_function(self):
+        """Test that the function where time is spent dominates the samples."""
+        live_snapshots = []
+        executor = IterativeRecursionEngine()
+        profiler = SamplingProfiler(executor, interval=0.001)
+
+        @executor.register
+        def slow(n: int) -> FunctionReturn:
+            time.sleep(0.005)
+            if n == 0:
+                live_snapshots.append(profiler.snapshot())
+                return FunctionReturn(returned_values={})
+            return FunctionReturn(
+                returned_values={"n": n - 1},
+                next_function_to_call="slow"
+            )
+
+        with profiler:
+            assert profiler.running
+            executor.start_function_caller(
+                next_function_to_call="slow",
+                environment_variables={"n": 10},
+                arg_env_mapping={"n": "n"}
+            )
+
+        assert not profiler.running
+        histogram = profiler.snapshot()
+        assert set(histogram) == {"slow"}
+        assert histogram["slow"] > 0
+        assert live_snapshots[0].get("slow", 0) > 0
+        assert "slow" in profiler.report()
+
+    def test_slow_thunk_charged_to_consumer(self):
+        """Test that forcing a Thunk is attributed to the function that reads it."""
+        forced_during = []
+        executor = IterativeRecursionEngine()
+        profiler = SamplingProfiler(executor, interval=0.001)
+
+        def expensive() -> int:
+            forced_during.append(executor.current_function)
+            time.sleep(0.05)
+            return 1
+
+        @executor.register
+        def produce() -> FunctionReturn:
+            return FunctionReturn(
+                returned_values={"value": Thunk(expensive)},
+                next_function_to_call="consume",
+                arg_env_mapping={"value": "value"}
+            )
+
+        @executor.register
+        def consume(value: int) -> FunctionReturn:
+            return FunctionReturn(returned_values={"result": value})
+
+        with profiler:
+            executor.start_function_caller(
+                next_function_to_call="produce",
+                environment_variables={},
+                arg_env_mapping={}
+            )
+
+        assert forced_during == ["consume"]
+        histogram = profiler.snapshot()
+        assert histogram.get("consume", 0) > histogram.get("produce", 0)
+
+    def test_mounted_functions_use_full_names(self):
+        """Test that sub-workflow functions are reported with their namespace."""
+        sub = IterativeRecursionEngine()
+        names = []
+
+        @sub.register
+        def work() -> FunctionReturn:
+            names.append(parent.current_function)
+            return FunctionReturn(returned_values={})
+
+        parent = IterativeRecursionEngine()
+        parent.mount("sub", sub, entry="work")
+
+        @parent.register
+        def begin() -> FunctionReturn:
+            return FunctionReturn(returned_values={}, next_function_to_call="sub")
+
+        parent.start_function_caller(
+            next_function_to_call="begin",
+            environment_variables={},
+            arg_env_mapping={}
+        )
+
+        assert names == ["sub.work"]
+
+    def test_idle_engine_and_reset(self):
+        """Test that idle samples are counted apart and reset clears them."""
+        profiler = SamplingProfiler(IterativeRecursionEngine(), interval=0.001)
+
+        with profiler:
+            time.sleep(0.02)
+
+        assert profiler.idle_samples > 0
+        assert profiler.snapshot() == {}
+        assert profiler.report() == "No samples collected."
+
+        profiler.reset()
+        assert profiler.idle_samples == 0
+
+    def test_invalid_arguments(self):
+        """Test argument validation and double start."""
+        with pytest.raises(ValueError, match="at least one engine"):
+            SamplingProfiler()
+        with pytest.raises(ValueError, match="interval must be > 0"):
+            SamplingProfiler(IterativeRecursionEngine(), interval=0)
+
+        profiler = SamplingProfiler(IterativeRecursionEngine())
+        with profiler:
+            with pytest.raises(RuntimeError, match="already running"):
+                profiler.start()